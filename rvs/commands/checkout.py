@@ -127,8 +127,7 @@ class CheckoutCommand(BaseCommand):
         if obj_type != "commit":
             raise RVSError(f"Not a commit: {tree_ish}")
         
-        import json
-        commit_data = json.loads(content.decode())
+        commit_data = self.repo._parse_commit(content)
         tree_hash = commit_data['tree']
         tree_files = self.repo._read_tree(tree_hash)
         
@@ -170,8 +169,7 @@ class CheckoutCommand(BaseCommand):
             if obj_type != "commit":
                 return
             
-            import json
-            commit_data = json.loads(content.decode())
+            commit_data = self.repo._parse_commit(content)
             tree_hash = commit_data['tree']
             tree_files = self.repo._read_tree(tree_hash)
             
@@ -249,17 +247,13 @@ class CheckoutCommand(BaseCommand):
         
         # Try partial hash matching
         if len(commit_ish) >= 4:  # Minimum partial hash length
-            for obj_dir in self.repo.objects_dir.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    for obj_file in obj_dir.iterdir():
-                        full_hash = obj_dir.name + obj_file.name
-                        if full_hash.startswith(commit_ish):
-                            try:
-                                obj_type, content = self.repo._read_object(full_hash)
-                                if obj_type == "commit":
-                                    return full_hash
-                            except Exception:
-                                continue
+            for full_hash in self.repo._find_objects_by_prefix(commit_ish):
+                try:
+                    obj_type, content = self.repo._read_object(full_hash)
+                    if obj_type == "commit":
+                        return full_hash
+                except Exception:
+                    continue
         
         raise RVSError(f"Not a valid commit: {commit_ish}")
     
@@ -278,8 +272,7 @@ class CheckoutCommand(BaseCommand):
             if obj_type != "commit":
                 return False
             
-            import json
-            commit_data = json.loads(content.decode())
+            commit_data = self.repo._parse_commit(content)
             tree_hash = commit_data['tree']
             committed_files = self.repo._read_tree(tree_hash)
             
@@ -316,8 +309,7 @@ class CheckoutCommand(BaseCommand):
             if obj_type != "commit":
                 return
             
-            import json
-            commit_data = json.loads(content.decode())
+            commit_data = self.repo._parse_commit(content)
             tree_hash = commit_data['tree']
             tree_files = self.repo._read_tree(tree_hash)
             
@@ -172,18 +172,14 @@ class DiffCommand(BaseCommand):
         # Try as commit hash (full or partial)
         if len(ref) >= 4:  # Minimum hash length
             # Search for matching commit hash
-            for obj_dir in self.repo.objects_dir.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    for obj_file in obj_dir.iterdir():
-                        full_hash = obj_dir.name + obj_file.name
-                        if full_hash.startswith(ref):
-                            # Verify it's a commit object
-                            try:
-                                obj_type, _ = self.repo._read_object(full_hash)
-                                if obj_type == "commit":
-                                    return full_hash
-                            except:
-                                continue
+            for full_hash in self.repo._find_objects_by_prefix(ref):
+                # Verify it's a commit object
+                try:
+                    obj_type, _ = self.repo._read_object(full_hash)
+                    if obj_type == "commit":
+                        return full_hash
+                except:
+                    continue
         
         return None
     
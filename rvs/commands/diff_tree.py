@@ -53,8 +53,7 @@ class DiffTreeCommand(BaseCommand):
             if obj_type != "commit":
                 raise RVSError(f"Not a commit: {commit_ref}")
             
-            import json
-            commit_data = json.loads(content.decode())
+            commit_data = self.repo._parse_commit(content)
             
             # Get parent commit
             parent_hash = commit_data.get('parent')
@@ -71,7 +70,7 @@ class DiffTreeCommand(BaseCommand):
                 try:
                     parent_obj_type, parent_content = self.repo._read_object(parent_hash)
                     if parent_obj_type == "commit":
-                        parent_commit_data = json.loads(parent_content.decode())
+                        parent_commit_data = self.repo._parse_commit(parent_content)
                         parent_tree = self.repo._read_tree(parent_commit_data['tree'])
                 except Exception:
                     pass
@@ -171,17 +170,13 @@ class DiffTreeCommand(BaseCommand):
         
         # Try partial hash matching
         if len(commit_ref) >= 4:
-            for obj_dir in self.repo.objects_dir.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    for obj_file in obj_dir.iterdir():
-                        full_hash = obj_dir.name + obj_file.name
-                        if full_hash.startswith(commit_ref):
-                            try:
-                                obj_type, content = self.repo._read_object(full_hash)
-                                if obj_type == "commit":
-                                    return full_hash
-                            except Exception:
-                                continue
+            for full_hash in self.repo._find_objects_by_prefix(commit_ref):
+                try:
+                    obj_type, content = self.repo._read_object(full_hash)
+                    if obj_type == "commit":
+                        return full_hash
+                except Exception:
+                    continue
         
         raise RVSError(f"Not a valid commit: {commit_ref}")
     
@@ -192,8 +187,7 @@ class DiffTreeCommand(BaseCommand):
             commit_hash = self._resolve_commit(tree_ref)
             obj_type, content = self.repo._read_object(commit_hash)
             if obj_type == "commit":
-                import json
-                commit_data = json.loads(content.decode())
+                commit_data = self.repo._parse_commit(content)
                 return commit_data['tree']
         except Exception:
             pass
@@ -77,8 +77,7 @@ class LsFilesCommand(BaseCommand):
             try:
                 obj_type, content = self.repo._read_object(commit_hash)
                 if obj_type == "commit":
-                    import json
-                    commit_data = json.loads(content.decode())
+                    commit_data = self.repo._parse_commit(content)
                     tree_hash = commit_data['tree']
                     committed_files = self.repo._read_tree(tree_hash)
             except Exception:
@@ -149,8 +148,7 @@ class LsFilesCommand(BaseCommand):
                 try:
                     obj_type, content = self.repo._read_object(commit_hash)
                     if obj_type == "commit":
-                        import json
-                        commit_data = json.loads(content.decode())
+                        commit_data = self.repo._parse_commit(content)
                         tree_hash = commit_data['tree']
                         committed_files = self.repo._read_tree(tree_hash)
                 except Exception:
@@ -51,8 +51,7 @@ class LsTreeCommand(BaseCommand):
         try:
             obj_type, content = self.repo._read_object(commit_hash)
             if obj_type == "commit":
-                import json
-                commit_data = json.loads(content.decode('utf-8'))
+                commit_data = self.repo._parse_commit(content)
                 return commit_data.get("tree")
             elif obj_type == "tree":
                 return commit_hash
@@ -84,17 +83,13 @@ class LsTreeCommand(BaseCommand):
         except Exception:
             # Try partial hash matching
             if len(commit_ish) >= 4:  # Minimum partial hash length
-                for obj_dir in self.repo.objects_dir.iterdir():
-                    if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                        for obj_file in obj_dir.iterdir():
-                            full_hash = obj_dir.name + obj_file.name
-                            if full_hash.startswith(commit_ish):
-                                try:
-                                    obj_type, content = self.repo._read_object(full_hash)
-                                    if obj_type == "commit":
-                                        return full_hash
-                                except Exception:
-                                    continue
+                for full_hash in self.repo._find_objects_by_prefix(commit_ish):
+                    try:
+                        obj_type, content = self.repo._read_object(full_hash)
+                        if obj_type == "commit":
+                            return full_hash
+                    except Exception:
+                        continue
             return None
     
     def _list_tree_contents(self, tree_hash: str, name_only: bool = False, 
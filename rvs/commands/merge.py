@@ -256,28 +256,23 @@ class MergeCommand(BaseCommand):
     def _create_merge_commit(self, files: Dict[str, str], message: str, 
                            parent1: str, parent2: str):
         """Create a merge commit with two parents."""
-        import json
         import time
-        from datetime import datetime
         
         # Create tree
         tree_hash = self.repo._create_tree(files)
         
         # Create merge commit
         timestamp = int(time.time())
-        date_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
         
         commit_data = {
             "tree": tree_hash,
             "parents": [parent1, parent2],
             "message": message,
             "timestamp": timestamp,
-            "date": date_str,
             "author": "RVS User"
         }
         
-        commit_content = json.dumps(commit_data, indent=2).encode()
-        commit_hash = self.repo._write_object(commit_content, "commit")
+        commit_hash = self.repo._write_commit(commit_data)
         
         # Update branch
         current_branch = self.repo._get_current_branch()
@@ -287,26 +282,21 @@ class MergeCommand(BaseCommand):
     
     def _create_commit(self, files: Dict[str, str], message: str, parent: str):
         """Create a regular commit."""
-        import json
         import time
-        from datetime import datetime
         
         tree_hash = self.repo._create_tree(files)
         
         timestamp = int(time.time())
-        date_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
         
         commit_data = {
             "tree": tree_hash,
             "parent": parent,
             "message": message,
             "timestamp": timestamp,
-            "date": date_str,
             "author": "RVS User"
         }
         
-        commit_content = json.dumps(commit_data, indent=2).encode()
-        commit_hash = self.repo._write_object(commit_content, "commit")
+        commit_hash = self.repo._write_commit(commit_data)
         
         current_branch = self.repo._get_current_branch()
         self.repo._set_branch_commit(current_branch, commit_hash)
@@ -326,8 +316,7 @@ class MergeCommand(BaseCommand):
             if obj_type != "commit":
                 return {}
             
-            import json
-            commit_data = json.loads(content.decode())
+            commit_data = self.repo._parse_commit(content)
             tree_hash = commit_data['tree']
             return self.repo._read_tree(tree_hash)
         except Exception:
@@ -371,17 +360,13 @@ class MergeCommand(BaseCommand):
         
         # Try partial hash matching
         if len(commit_ish) >= 4:  # Minimum partial hash length
-            for obj_dir in self.repo.objects_dir.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    for obj_file in obj_dir.iterdir():
-                        full_hash = obj_dir.name + obj_file.name
-                        if full_hash.startswith(commit_ish):
-                            try:
-                                obj_type, content = self.repo._read_object(full_hash)
-                                if obj_type == "commit":
-                                    return full_hash
-                            except Exception:
-                                continue
+            for full_hash in self.repo._find_objects_by_prefix(commit_ish):
+                try:
+                    obj_type, content = self.repo._read_object(full_hash)
+                    if obj_type == "commit":
+                        return full_hash
+                except Exception:
+                    continue
         
         raise RVSError(f"merge: {commit_ish} - not something we can merge")
     
@@ -421,8 +406,7 @@ class MergeCommand(BaseCommand):
         if obj_type != "commit":
             raise RVSError(f"Not a commit: {commit_hash}")
         
-        import json
-        return json.loads(content.decode())
+        return self.repo._parse_commit(content)
     
     def _is_fast_forward(self, current: str, target: str) -> bool:
         """Check if target is ahead of current (fast-forward possible)."""
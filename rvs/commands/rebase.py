@@ -159,8 +159,7 @@ class RebaseCommand(BaseCommand):
         if obj_type != "commit":
             raise RVSError(f"Not a commit: {commit_hash}")
         
-        import json
-        return json.loads(content.decode())
+        return self.repo._parse_commit(content)
     
     def _get_commit_files(self, commit_hash: str) -> dict:
         """Get files from commit."""
@@ -170,28 +169,23 @@ class RebaseCommand(BaseCommand):
     
     def _create_commit_on_base(self, files: dict, message: str, parent: str) -> str:
         """Create a new commit with given files and parent."""
-        import json
         import time
-        from datetime import datetime
         
         # Create tree
         tree_hash = self.repo._create_tree(files)
         
         # Create commit
         timestamp = int(time.time())
-        date_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
         
         commit_data = {
             "tree": tree_hash,
             "parent": parent,
             "message": message,
             "timestamp": timestamp,
-            "date": date_str,
             "author": "RVS User"
         }
         
-        commit_content = json.dumps(commit_data, indent=2).encode()
-        return self.repo._write_object(commit_content, "commit")
+        return self.repo._write_commit(commit_data)
     
     def _update_working_tree(self, commit_hash: str):
         """Update working tree to match commit."""
@@ -249,17 +243,13 @@ class RebaseCommand(BaseCommand):
         
         # Try partial hash matching
         if len(commit_ish) >= 4:  # Minimum partial hash length
-            for obj_dir in self.repo.objects_dir.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    for obj_file in obj_dir.iterdir():
-                        full_hash = obj_dir.name + obj_file.name
-                        if full_hash.startswith(commit_ish):
-                            try:
-                                obj_type, content = self.repo._read_object(full_hash)
-                                if obj_type == "commit":
-                                    return full_hash
-                            except Exception:
-                                continue
+            for full_hash in self.repo._find_objects_by_prefix(commit_ish):
+                try:
+                    obj_type, content = self.repo._read_object(full_hash)
+                    if obj_type == "commit":
+                        return full_hash
+                except Exception:
+                    continue
         
         raise RVSError(f"Not a valid commit: {commit_ish}")
     
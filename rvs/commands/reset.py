@@ -92,8 +92,7 @@ class ResetCommand(BaseCommand):
             if obj_type != "commit":
                 raise RVSError(f"Not a commit: {tree_ish}")
             
-            import json
-            commit_data = json.loads(content.decode())
+            commit_data = self.repo._parse_commit(content)
             tree_hash = commit_data['tree']
             tree_files = self.repo._read_tree(tree_hash)
             
@@ -127,8 +126,7 @@ class ResetCommand(BaseCommand):
             if obj_type != "commit":
                 return
             
-            import json
-            commit_data = json.loads(content.decode())
+            commit_data = self.repo._parse_commit(content)
             tree_hash = commit_data['tree']
             tree_files = self.repo._read_tree(tree_hash)
             
@@ -145,8 +143,7 @@ class ResetCommand(BaseCommand):
             if obj_type != "commit":
                 return
             
-            import json
-            commit_data = json.loads(content.decode())
+            commit_data = self.repo._parse_commit(content)
             tree_hash = commit_data['tree']
             tree_files = self.repo._read_tree(tree_hash)
             
@@ -231,17 +228,13 @@ class ResetCommand(BaseCommand):
         
         # Try partial hash matching
         if len(commit_ref) >= 4:
-            for obj_dir in self.repo.objects_dir.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    for obj_file in obj_dir.iterdir():
-                        full_hash = obj_dir.name + obj_file.name
-                        if full_hash.startswith(commit_ref):
-                            try:
-                                obj_type, content = self.repo._read_object(full_hash)
-                                if obj_type == "commit":
-                                    return full_hash
-                            except Exception:
-                                continue
+            for full_hash in self.repo._find_objects_by_prefix(commit_ref):
+                try:
+                    obj_type, content = self.repo._read_object(full_hash)
+                    if obj_type == "commit":
+                        return full_hash
+                except Exception:
+                    continue
         
         raise RVSError(f"Not a valid commit: {commit_ref}")
     
@@ -255,8 +248,7 @@ class ResetCommand(BaseCommand):
                 if obj_type != "commit":
                     raise RVSError(f"Not enough history")
                 
-                import json
-                commit_data = json.loads(content.decode())
+                commit_data = self.repo._parse_commit(content)
                 parent_hash = commit_data.get('parent')
                 
                 if not parent_hash:
@@ -98,17 +98,13 @@ class RestoreCommand(BaseCommand):
         
         # Try partial hash matching
         if len(commit_ish) >= 4:  # Minimum partial hash length
-            for obj_dir in self.repo.objects_dir.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    for obj_file in obj_dir.iterdir():
-                        full_hash = obj_dir.name + obj_file.name
-                        if full_hash.startswith(commit_ish):
-                            try:
-                                obj_type, content = self.repo._read_object(full_hash)
-                                if obj_type == "commit":
-                                    return full_hash
-                            except Exception:
-                                continue
+            for full_hash in self.repo._find_objects_by_prefix(commit_ish):
+                try:
+                    obj_type, content = self.repo._read_object(full_hash)
+                    if obj_type == "commit":
+                        return full_hash
+                except Exception:
+                    continue
         
         raise RVSError(f"Not a valid commit: {commit_ish}")
     
@@ -147,8 +143,7 @@ class RestoreCommand(BaseCommand):
                         source_commit = self._resolve_commit('HEAD')
                         obj_type, content = self.repo._read_object(source_commit)
                         if obj_type == "commit":
-                            import json
-                            commit_data = json.loads(content.decode())
+                            commit_data = self.repo._parse_commit(content)
                             tree_hash = commit_data['tree']
                             tree_files = self.repo._read_tree(tree_hash)
                             
@@ -171,8 +166,7 @@ class RestoreCommand(BaseCommand):
         if obj_type != "commit":
             raise RVSError(f"Not a commit: {source_commit}")
         
-        import json
-        commit_data = json.loads(content.decode())
+        commit_data = self.repo._parse_commit(content)
         tree_hash = commit_data['tree']
         tree_files = self.repo._read_tree(tree_hash)
         
@@ -208,8 +202,7 @@ class RestoreCommand(BaseCommand):
         if obj_type != "commit":
             raise RVSError(f"Not a commit: {source_commit}")
         
-        import json
-        commit_data = json.loads(content.decode())
+        commit_data = self.repo._parse_commit(content)
         tree_hash = commit_data['tree']
         tree_files = self.repo._read_tree(tree_hash)
         
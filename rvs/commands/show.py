@@ -53,11 +53,10 @@ class ShowCommand(BaseCommand):
     def _show_commit(self, commit_hash: str, content: bytes, name_status: bool, 
                     name_only: bool, stat: bool, no_patch: bool):
         """Show a commit object."""
-        import json
         import time
         import datetime
         
-        commit_data = json.loads(content.decode())
+        commit_data = self.repo._parse_commit(content)
         
         # Show commit header
         print(f"commit {commit_hash}")
@@ -101,7 +100,7 @@ class ShowCommand(BaseCommand):
             try:
                 parent_obj_type, parent_content = self.repo._read_object(parent_hash)
                 if parent_obj_type == "commit":
-                    parent_commit_data = json.loads(parent_content.decode())
+                    parent_commit_data = self.repo._parse_commit(parent_content)
                     parent_tree_hash = parent_commit_data['tree']
                     parent_files = self.repo._read_tree(parent_tree_hash)
             except Exception:
@@ -221,16 +220,12 @@ class ShowCommand(BaseCommand):
         
         # Try partial hash matching
         if len(object_ref) >= 4:
-            for obj_dir in self.repo.objects_dir.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    for obj_file in obj_dir.iterdir():
-                        full_hash = obj_dir.name + obj_file.name
-                        if full_hash.startswith(object_ref):
-                            try:
-                                obj_type, content = self.repo._read_object(full_hash)
-                                return full_hash
-                            except Exception:
-                                continue
+            for full_hash in self.repo._find_objects_by_prefix(object_ref):
+                try:
+                    obj_type, content = self.repo._read_object(full_hash)
+                    return full_hash
+                except Exception:
+                    continue
         
         raise RVSError(f"Not a valid object: {object_ref}")
     
@@ -153,7 +153,7 @@ class StashCommand(BaseCommand):
         
         try:
             with open(stash_file, 'w', encoding='utf-8') as f:
-                json.dump(stashes, f, indent=2)
+                json.dump(stashes, f, separators=(",", ":"))
         except Exception as e:
             raise RVSError(f"Failed to save stash: {e}")
         
@@ -331,7 +331,7 @@ class StashCommand(BaseCommand):
             stash = stashes.pop(idx)
             
             with open(stash_file, 'w', encoding='utf-8') as f:
-                json.dump(stashes, f, indent=2)
+                json.dump(stashes, f, separators=(",", ":"))
             
             if show_output:
                 print(f"Dropped stash@{{{idx}}} ({stash['message']})")
@@ -343,8 +343,7 @@ class WorktreeCommand(BaseCommand):
             if obj_type != "commit":
                 return checked_out_files
             
-            import json
-            commit_data = json.loads(content.decode('utf-8'))
+            commit_data = self.repo._parse_commit(content)
             tree_hash = commit_data['tree']
             tree_files = self.repo._read_tree(tree_hash)
             
@@ -377,22 +376,11 @@ class WorktreeCommand(BaseCommand):
     
     def _create_worktree_index(self, worktree_metadata_dir: Path, checked_out_files: dict):
         """Create an index file for the worktree that matches the checked out files."""
-        from ..core.index import Index
+        from ..core.index import Index, IndexEntries
         
         # Create index in the worktree metadata directory
-        # We need to create a temporary repo path for the Index class
-        # The Index class expects the repo path, but we want to save to a specific location
         index_file = worktree_metadata_dir / 'index'
-        
-        # Convert checked_out_files to the format expected by Index
-        entries = {}
-        for file_path, file_hash in checked_out_files.items():
-            entries[file_path] = {'obj_hash': file_hash}
-        
-        # Save the index directly to the metadata directory
-        import json
-        with open(index_file, 'w', encoding='utf-8') as f:
-            json.dump(entries, f, indent=2)
+        Index(self.repo.repo_path, index_file).save(IndexEntries.from_hashes(checked_out_files))
     
 
     
@@ -493,17 +481,13 @@ class WorktreeCommand(BaseCommand):
         
         # Try partial hash matching
         if len(commit_ish) >= 4:  # Minimum partial hash length
-            for obj_dir in self.repo.objects_dir.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    for obj_file in obj_dir.iterdir():
-                        full_hash = obj_dir.name + obj_file.name
-                        if full_hash.startswith(commit_ish):
-                            try:
-                                obj_type, content = self.repo._read_object(full_hash)
-                                if obj_type == "commit":
-                                    return full_hash
-                            except Exception:
-                                continue
+            for full_hash in self.repo._find_objects_by_prefix(commit_ish):
+                try:
+                    obj_type, content = self.repo._read_object(full_hash)
+                    if obj_type == "commit":
+                        return full_hash
+                except Exception:
+                    continue
         
         raise RVSError(f"Not a valid commit: {commit_ish}")
     
@@ -1,13 +1,115 @@
 """
 Git hooks implementation.
 """
+import functools
+import locale
 import os
 import platform
 import shutil
 import subprocess
 import sys
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
+
+_IS_WINDOWS = platform.system() == "Windows"
+
+@functools.lru_cache(maxsize=32)
+def _which(command: str) -> Optional[str]:
+    """Memoized shutil.which; PATH is scanned at most once per command."""
+    return shutil.which(command)
+
+def _python_interpreter() -> str:
+    """Interpreter for user Python hooks: the `python` found on PATH.
+    
+    Hooks may depend on packages installed for that interpreter, so they do not
+    run on the one executing RVS (sys.executable). The PATH lookup is memoized.
+    """
+    return _which("python") or "python"
+
+_SAMPLE_PRE_COMMIT = """#!/bin/sh
+# Sample pre-commit hook
+echo "Running pre-commit hook"
+# Add your checks here
+# Exit with non-zero status to abort commit
+exit 0
+"""
+
+_SAMPLE_POST_COMMIT = """#!/bin/sh
+# Sample post-commit hook
+echo "Running post-commit hook"
+# Add your post-commit actions here
+exit 0
+"""
+
+_SAMPLE_PRE_COMMIT_BAT = """@echo off
+REM Sample pre-commit hook (Windows batch version)
+echo Running pre-commit hook
+REM Add your checks here
+REM Exit with non-zero status to abort commit
+exit /b 0
+"""
+
+_SAMPLE_POST_COMMIT_BAT = """@echo off
+REM Sample post-commit hook (Windows batch version)
+echo Running post-commit hook
+REM Add your post-commit actions here
+exit /b 0
+"""
+
+# Sample hook files as they may appear on disk (LF, or CRLF when written
+# through a text-mode handle on Windows)
+_SAMPLE_HOOK_CONTENTS = frozenset(
+    content.encode('utf-8').replace(b'\n', newline)
+    for content in (_SAMPLE_PRE_COMMIT, _SAMPLE_POST_COMMIT,
+                    _SAMPLE_PRE_COMMIT_BAT, _SAMPLE_POST_COMMIT_BAT)
+    for newline in (b'\n', b'\r\n')
+)
+_SAMPLE_HOOK_SIZES = frozenset(len(content) for content in _SAMPLE_HOOK_CONTENTS)
+
+# Batch commands equivalent to the unmodified sample shell hooks
+_SAMPLE_BATCH_COMMANDS = {
+    _SAMPLE_PRE_COMMIT: ('cmd', '/c', 'echo Running pre-commit hook'),
+    _SAMPLE_POST_COMMIT: ('cmd', '/c', 'echo Running post-commit hook'),
+}
+
+_SAMPLE_ECHO_COMMANDS = frozenset([
+    'echo Running pre-commit hook',
+    'echo Running post-commit hook',
+    'echo Running hook',
+])
+
+# Bytes read from a hook file when looking for its shebang line
+_SHEBANG_READ_SIZE = 128
+
+# Longest converted script run inline via 'cmd /c' (cmd.exe caps a command
+# line at 8191 characters)
+_MAX_INLINE_SCRIPT = 8000
+
+def _convert_echo(message: str) -> str:
+    """Convert the arguments of a shell echo to a batch echo."""
+    message = message.strip()
+    # Remove quotes if present
+    if message.startswith('"') and message.endswith('"'):
+        message = message[1:-1]
+    elif message.startswith("'") and message.endswith("'"):
+        message = message[1:-1]
+    return f'echo {message}'
+
+def _convert_exit(code: str) -> str:
+    """Convert a shell exit to a batch exit that only leaves the script."""
+    return f'exit /b {code.strip()}'
+
+def _convert_cd(path: str) -> str:
+    """Convert a shell cd to a batch cd that can also change drives."""
+    path = path.strip().strip('"\'')
+    return f'cd /d "{path}"'
+
+# Shell command name -> converter for the rest of the line
+_SHELL_LINE_CONVERTERS = {
+    'echo': _convert_echo,
+    'exit': _convert_exit,
+    'cd': _convert_cd,
+}
 
 class Hook:
     """Manages Git hooks."""
@@ -15,24 +117,26 @@ class Hook:
     def __init__(self, repo_path: Path):
         self.repo_path = repo_path
         self.hooks_dir = repo_path / ".rvs" / "hooks"
+        # Resolved hook commands keyed by (hook file, mtime_ns, args)
+        self._cmd_cache = {}
+        # Directory listing of hooks_dir (name -> os.DirEntry), read lazily
+        self._entries_cache = None
     
     def run_hook(self, hook_name: str, args: List[str] = None) -> bool:
         """Run a hook script if it exists."""
-        hook_file = self.hooks_dir / hook_name
+        entries = self._hook_entries()
         
         # On Windows, prioritize .bat version
-        if platform.system() == "Windows":
-            bat_hook_file = self.hooks_dir / f"{hook_name}.bat"
-            if bat_hook_file.exists():
-                hook_file = bat_hook_file
-            elif not hook_file.exists():
-                return True  # Neither version exists
-        
-        if not hook_file.exists():
+        entry = entries.get(f"{hook_name}.bat") if _IS_WINDOWS else None
+        if entry is None:
+            entry = entries.get(hook_name)
+        if entry is None:
             return True  # Hook doesn't exist
+        hook_file = self.hooks_dir / entry.name
         
-        # On Unix-like systems, check if executable
-        if platform.system() != "Windows" and not os.access(hook_file, os.X_OK):
+        # On Unix-like systems, check if executable by this user (os.access also
+        # honors ownership, which the mode bits alone do not tell)
+        if not _IS_WINDOWS and not os.access(entry.path, os.X_OK):
             return True  # Hook isn't executable
         
         temp_files_to_cleanup = []
@@ -45,24 +149,34 @@ class Hook:
             cmd = self._get_hook_command(hook_file, args or [])
             
             # Check if this is a temporary batch file that needs cleanup
-            if (platform.system() == "Windows" and len(cmd) >= 3 and 
-                cmd[0] == 'cmd' and cmd[1] == '/c' and cmd[2].endswith('.bat')):
+            if self._is_temp_batch(cmd):
                 temp_files_to_cleanup.append(cmd[2])
             
-            # Run hook
+            # Sample hooks only print their "Running ..." banner, which is
+            # never shown, so don't set up pipes for them at all
+            if self._is_sample_command(cmd) or self._is_sample_hook(entry):
+                result = subprocess.run(
+                    cmd,
+                    cwd=self.repo_path,
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL
+                )
+                return result.returncode == 0
+            
+            # Run hook, keeping output as bytes and decoding only what is printed
             result = subprocess.run(
                 cmd,
                 cwd=self.repo_path,
                 env=env,
-                capture_output=True,
-                text=True
+                capture_output=True
             )
             
             # Only print hook output if it's not the default sample hook messages
-            if result.stdout and not result.stdout.strip().startswith("Running "):
-                print(result.stdout)
+            if result.stdout and not result.stdout.strip().startswith(b"Running "):
+                print(self._decode_output(result.stdout))
             if result.stderr:
-                print(result.stderr, file=sys.stderr)
+                print(self._decode_output(result.stderr), file=sys.stderr)
             
             return result.returncode == 0
         except Exception as e:
@@ -77,53 +191,115 @@ class Hook:
                 except Exception:
                     pass  # Ignore cleanup errors
     
+    def _hook_entries(self) -> Dict[str, os.DirEntry]:
+        """List the hooks directory once, mapping file names to directory entries."""
+        if self._entries_cache is None:
+            try:
+                with os.scandir(self.hooks_dir) as it:
+                    self._entries_cache = {entry.name: entry for entry in it}
+            except OSError:
+                self._entries_cache = {}
+        return self._entries_cache
+    
+    def _is_sample_command(self, cmd: List[str]) -> bool:
+        """Check if a command is the inline batch equivalent of a sample hook."""
+        return (len(cmd) == 3 and cmd[0] == 'cmd' and cmd[1] == '/c' and
+                cmd[2] in _SAMPLE_ECHO_COMMANDS)
+    
+    def _is_sample_hook(self, entry: os.DirEntry) -> bool:
+        """Check if a hook file is an unmodified sample hook."""
+        try:
+            if entry.stat().st_size not in _SAMPLE_HOOK_SIZES:
+                return False
+            with open(entry.path, 'rb') as f:
+                return f.read() in _SAMPLE_HOOK_CONTENTS
+        except OSError:
+            return False
+    
+    def _decode_output(self, data: bytes) -> str:
+        """Decode captured hook output for printing."""
+        return data.decode(locale.getpreferredencoding(False), errors='replace').replace('\r\n', '\n')
+    
+    def _is_temp_batch(self, cmd: List[str]) -> bool:
+        """Check if a command runs a temporary batch file converted from a shell script."""
+        return (_IS_WINDOWS and len(cmd) >= 3 and
+                cmd[0] == 'cmd' and cmd[1] == '/c' and cmd[2].endswith('.bat'))
+    
     def _get_hook_command(self, hook_file: Path, args: List[str]) -> List[str]:
         """Get the appropriate command to execute a hook file cross-platform."""
-        if platform.system() == "Windows":
-            # On Windows, we need to determine the interpreter based on shebang or file extension
-            try:
-                with open(hook_file, 'r', encoding='utf-8') as f:
-                    first_line = f.readline().strip()
-                    if first_line.startswith('#!'):
-                        shebang = first_line[2:].strip()
-                        
-                        # Handle different shebang patterns
-                        if 'python' in shebang.lower():
-                            return ['python', str(hook_file)] + args
-                        elif any(shell in shebang.lower() for shell in ['sh', 'bash']):
-                            # Try to find bash (Git Bash, WSL, etc.)
-                            for bash_cmd in ['bash', 'sh']:
-                                if self._command_exists(bash_cmd):
-                                    return [bash_cmd, str(hook_file)] + args
-                            # Fallback: convert shell script to batch equivalent or skip
-                            return self._convert_shell_to_batch(hook_file, args)
-                        elif 'cmd' in shebang.lower() or 'bat' in shebang.lower():
-                            return ['cmd', '/c', str(hook_file)] + args
-            except (UnicodeDecodeError, IOError):
-                pass
-            
-            # Check file extension as fallback
-            suffix = hook_file.suffix.lower()
-            if suffix in ['.py']:
-                return ['python', str(hook_file)] + args
-            elif suffix in ['.bat', '.cmd']:
-                return ['cmd', '/c', str(hook_file)] + args
-            elif suffix in ['.ps1']:
-                return ['powershell', '-ExecutionPolicy', 'Bypass', '-File', str(hook_file)] + args
-            
-            # Default: try bash first, then convert to batch
-            if self._command_exists('bash'):
-                return ['bash', str(hook_file)] + args
-            else:
-                # No bash available, try to convert shell script to batch
-                return self._convert_shell_to_batch(hook_file, args)
-        else:
+        if not _IS_WINDOWS:
             # On Unix-like systems, execute directly (shebang will be handled by OS)
             return [str(hook_file)] + args
+        
+        # Resolving the interpreter on Windows reads the hook file, so reuse
+        # the result until the hook is modified
+        try:
+            key = (hook_file, hook_file.stat().st_mtime_ns, tuple(args))
+        except OSError:
+            return self._resolve_hook_command(hook_file, args)
+        cmd = self._cmd_cache.get(key)
+        if cmd is None:
+            cmd = self._resolve_hook_command(hook_file, args)
+            # Temporary batch files are deleted after each run, never cache them
+            if not self._is_temp_batch(cmd):
+                self._cmd_cache[key] = cmd
+        return list(cmd)
+    
+    def _resolve_hook_command(self, hook_file: Path, args: List[str]) -> List[str]:
+        """Determine the command used to execute a hook file on Windows."""
+        # On Windows, we need to determine the interpreter based on shebang or file extension
+        shebang = self._read_shebang(hook_file)
+        if shebang is not None:
+            # Handle different shebang patterns
+            if 'python' in shebang:
+                return [_python_interpreter(), str(hook_file)] + args
+            elif any(shell in shebang for shell in ['sh', 'bash']):
+                # Try to find bash (Git Bash, WSL, etc.)
+                for bash_cmd in ['bash', 'sh']:
+                    if self._command_exists(bash_cmd):
+                        return [bash_cmd, str(hook_file)] + args
+                # Fallback: convert shell script to batch equivalent or skip
+                return self._convert_shell_to_batch(hook_file, args)
+            elif 'cmd' in shebang or 'bat' in shebang:
+                return ['cmd', '/c', str(hook_file)] + args
+        
+        # Check file extension as fallback
+        suffix = hook_file.suffix.lower()
+        if suffix in ['.py']:
+            return [_python_interpreter(), str(hook_file)] + args
+        elif suffix in ['.bat', '.cmd']:
+            return ['cmd', '/c', str(hook_file)] + args
+        elif suffix in ['.ps1']:
+            return ['powershell', '-ExecutionPolicy', 'Bypass', '-File', str(hook_file)] + args
+        
+        # Default: try bash first, then convert to batch
+        if self._command_exists('bash'):
+            return ['bash', str(hook_file)] + args
+        else:
+            # No bash available, try to convert shell script to batch
+            return self._convert_shell_to_batch(hook_file, args)
+    
+    def _read_shebang(self, hook_file: Path) -> Optional[str]:
+        """Return the lowercased interpreter line of a hook, or None if it has none."""
+        # Only the first line matters, so read a small fixed prefix with a raw
+        # descriptor rather than opening a decoding text stream
+        try:
+            fd = os.open(str(hook_file), os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+            try:
+                head = os.read(fd, _SHEBANG_READ_SIZE)
+            finally:
+                os.close(fd)
+        except OSError:
+            return None
+        
+        first_line = head.split(b'\n', 1)[0].strip()
+        if not first_line.startswith(b'#!'):
+            return None
+        return first_line[2:].strip().decode('utf-8', errors='replace').lower()
     
     def _command_exists(self, command: str) -> bool:
         """Check if a command exists in PATH."""
-        return shutil.which(command) is not None
+        return _which(command) is not None
     
     def _convert_shell_to_batch(self, hook_file: Path, args: List[str]) -> List[str]:
         """Convert a simple shell script to batch commands."""
@@ -131,6 +307,11 @@ class Hook:
             with open(hook_file, 'r', encoding='utf-8') as f:
                 content = f.read()
             
+            # Unmodified sample hooks have a known batch equivalent
+            sample_cmd = _SAMPLE_BATCH_COMMANDS.get(content)
+            if sample_cmd is not None:
+                return list(sample_cmd)
+            
             # Check if it's a simple sample hook that we can convert inline
             if 'echo "Running' in content and 'exit 0' in content:
                 # This is likely a sample hook, convert to simple batch command
@@ -151,9 +332,36 @@ class Hook:
     def _create_temp_batch_from_shell(self, hook_file: Path, content: str, args: List[str]) -> List[str]:
         """Create a temporary batch file from shell script content."""
         import tempfile
-        import re
         
         try:
+            # Convert each line of the shell script
+            converted_lines = []
+            for line in content.split('\n'):
+                line = line.strip()
+                
+                # Skip empty lines and comments
+                if not line or line.startswith('#'):
+                    continue
+                
+                # Convert common shell commands to batch equivalents; other
+                # commands (python invocations etc.) are executed as-is since
+                # many work the same on Windows
+                command, sep, rest = line.partition(' ')
+                converter = _SHELL_LINE_CONVERTERS.get(command) if sep else None
+                converted_lines.append(converter(rest) if converter else line)
+            
+            # Small scripts run inline as one cmd.exe command line, which
+            # avoids writing and deleting a temporary file. '&' keeps batch
+            # semantics of running every line regardless of earlier errors
+            # (no space before it, or echo would print a trailing blank).
+            # Scripts that take arguments or contain characters that are
+            # interpreted differently on a command line (% expansion, quote
+            # escaping) still go through a batch file.
+            inline = '& '.join(converted_lines + ['exit /b 0'])
+            if (not args and len(inline) <= _MAX_INLINE_SCRIPT and
+                    '%' not in inline and '"' not in inline):
+                return ['cmd', '/c', inline]
+            
             # Create temporary batch file
             temp_bat = tempfile.NamedTemporaryFile(mode='w', suffix='.bat', delete=False, encoding='utf-8')
             
@@ -162,47 +370,8 @@ class Hook:
             temp_bat.write('REM Converted from shell script\n')
             temp_bat.write('REM Original: {}\n'.format(hook_file.name))
             temp_bat.write('\n')
-            
-            # Process each line of the shell script
-            lines = content.split('\n')
-            for line in lines:
-                line = line.strip()
-                
-                # Skip empty lines and comments
-                if not line or line.startswith('#'):
-                    continue
-                
-                # Convert common shell commands to batch equivalents
-                if line.startswith('echo '):
-                    # Handle echo commands
-                    message = line[5:].strip()
-                    # Remove quotes if present
-                    if message.startswith('"') and message.endswith('"'):
-                        message = message[1:-1]
-                    elif message.startswith("'") and message.endswith("'"):
-                        message = message[1:-1]
-                    temp_bat.write(f'echo {message}\n')
-                    
-                elif line == 'exit 0':
-                    temp_bat.write('exit /b 0\n')
-                    
-                elif line.startswith('exit '):
-                    code = line[5:].strip()
-                    temp_bat.write(f'exit /b {code}\n')
-                    
-                elif 'python' in line.lower() and ('.py' in line or 'python' == line.split()[0]):
-                    # Handle python commands
-                    temp_bat.write(f'{line}\n')
-                    
-                elif line.startswith('cd '):
-                    # Handle directory changes
-                    path = line[3:].strip().strip('"\'')
-                    temp_bat.write(f'cd /d "{path}"\n')
-                    
-                else:
-                    # For other commands, try to execute as-is
-                    # Many commands work the same on Windows
-                    temp_bat.write(f'{line}\n')
+            for converted in converted_lines:
+                temp_bat.write(f'{converted}\n')
             
             # Ensure we exit with success if no explicit exit
             temp_bat.write('\nif not defined ERRORLEVEL exit /b 0\n')
@@ -219,58 +388,35 @@ class Hook:
         """Install sample hooks."""
         # Create hooks directory if it doesn't exist
         self.hooks_dir.mkdir(parents=True, exist_ok=True)
+        self._entries_cache = None
         
-        # Pre-commit hook
-        pre_commit = self.hooks_dir / "pre-commit"
-        with open(pre_commit, 'w', encoding='utf-8') as f:
-            f.write("""#!/bin/sh
-# Sample pre-commit hook
-echo "Running pre-commit hook"
-# Add your checks here
-# Exit with non-zero status to abort commit
-exit 0
-""")
-        
-        # Post-commit hook
-        post_commit = self.hooks_dir / "post-commit"
-        with open(post_commit, 'w', encoding='utf-8') as f:
-            f.write("""#!/bin/sh
-# Sample post-commit hook
-echo "Running post-commit hook"
-# Add your post-commit actions here
-exit 0
-""")
-        
-        # Set executable permissions on Unix-like systems
-        if platform.system() != "Windows":
-            pre_commit.chmod(0o755)
-            post_commit.chmod(0o755)
+        # Hooks are written through one descriptor that also sets their mode
+        self._write_hook_file("pre-commit", _SAMPLE_PRE_COMMIT)
+        self._write_hook_file("post-commit", _SAMPLE_POST_COMMIT)
         
         # On Windows, also create .bat versions for better compatibility
-        if platform.system() == "Windows":
-            # Pre-commit batch file
-            pre_commit_bat = self.hooks_dir / "pre-commit.bat"
-            with open(pre_commit_bat, 'w', encoding='utf-8') as f:
-                f.write("""@echo off
-REM Sample pre-commit hook (Windows batch version)
-echo Running pre-commit hook
-REM Add your checks here
-REM Exit with non-zero status to abort commit
-exit /b 0
-""")
-            
-            # Post-commit batch file
-            post_commit_bat = self.hooks_dir / "post-commit.bat"
-            with open(post_commit_bat, 'w', encoding='utf-8') as f:
-                f.write("""@echo off
-REM Sample post-commit hook (Windows batch version)
-echo Running post-commit hook
-REM Add your post-commit actions here
-exit /b 0
-""")
+        if _IS_WINDOWS:
+            self._write_hook_file("pre-commit.bat", _SAMPLE_PRE_COMMIT_BAT)
+            self._write_hook_file("post-commit.bat", _SAMPLE_POST_COMMIT_BAT)
         
         if show_message:
-            if platform.system() == "Windows":
+            if _IS_WINDOWS:
                 print("Sample hooks installed in .rvs/hooks/ (both shell and batch versions for Windows compatibility)")
             else:
                 print("Sample hooks installed in .rvs/hooks/")
+    
+    def _write_hook_file(self, name: str, content: str):
+        """Write a hook script and make it executable."""
+        data = content.encode('utf-8')
+        if name.endswith('.bat'):
+            data = data.replace(b'\n', b'\r\n')
+        fd = os.open(str(self.hooks_dir / name),
+                     os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o755)
+        try:
+            # The open mode only applies to a new file and is filtered by the
+            # umask; an existing hook keeps its mode unless it is set explicitly
+            if not _IS_WINDOWS:
+                os.fchmod(fd, 0o755)
+            os.write(fd, data)
+        finally:
+            os.close(fd)
\ No newline at end of file
@@ -2,50 +2,310 @@
 Index (staging area) management with simplified format.
 """
 import json
+import os
+import struct
+import sys
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from ..exceptions import IndexError
+from .objects import INTERN_PATH_LIMIT
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Binary index layout: header, one fixed-size record per entry, then all paths
+# as NUL-separated UTF-8 (surrogateescape). Records are (sha1, mtime_ns, ctime_ns,
+# size, ino); an mtime_ns of 0 means the entry has no stat data, which is also
+# written when a value does not fit its field. Older indexes are JSON.
+_INDEX_MAGIC = b"RVSI"
+_INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct("<4sII")
+_INDEX_RECORD = struct.Struct("<20sqqQQ")
+
+def walk_working_tree(root: Path, prefix: str = "") -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (relative path, stat) for every file under root, skipping .rvs.
+    
+    Uses one os.scandir pass per directory; DirEntry caches file type information,
+    so no separate is_file()/is_dir() stat calls are needed. Symlinked directories
+    are not followed, like Path.rglob.
+    """
+    stack = [(os.fspath(root), prefix)]
+    while stack:
+        dir_path, dir_prefix = stack.pop()
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                rel_path = dir_prefix + entry.name
+                if rel_path == ".rvs":
+                    # Repository directory, or the gitdir-style file of a worktree
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, rel_path + "/"))
+                    elif entry.is_file():
+                        yield rel_path, entry.stat()
+                except OSError:
+                    continue
+
+class IndexEntries(Mapping):
+    """Index entries stored column-wise: one list per field, aligned by position.
+    
+    Keeping parallel lists instead of one small dict per path saves memory and
+    serializes as a handful of flat JSON arrays. For compatibility the class is
+    a read-only mapping of path -> per-file dict, built on demand.
+    """
+    
+    STAT_FIELDS = ("mtime_ns", "ctime_ns", "size", "ino")
+    FIELDS = ("obj_hash",) + STAT_FIELDS
+    
+    def __init__(self, paths: Optional[List[str]] = None,
+                 columns: Optional[Dict[str, list]] = None):
+        self.paths = paths if paths is not None else []
+        columns = columns or {}
+        self.columns = {field: columns.get(field) or [None] * len(self.paths)
+                        for field in self.FIELDS}
+        self._positions = {path: i for i, path in enumerate(self.paths)}
+    
+    @classmethod
+    def from_hashes(cls, hashes: Dict[str, str],
+                    previous: Optional['IndexEntries'] = None) -> 'IndexEntries':
+        """Build entries from a path -> object hash mapping.
+        
+        Stat data is carried over from previous for paths whose hash is unchanged.
+        """
+        entries = cls(list(hashes), {"obj_hash": list(hashes.values())})
+        if previous is not None:
+            entries._carry_stat(previous)
+        return entries
+    
+    @classmethod
+    def from_dict(cls, entries: Dict[str, Dict]) -> 'IndexEntries':
+        """Build entries from the per-file layout (path -> {field: value})."""
+        columns = {field: [data.get(field) for data in entries.values()]
+                   for field in cls.FIELDS}
+        return cls(list(entries), columns)
+    
+    @classmethod
+    def from_json(cls, data: Dict) -> 'IndexEntries':
+        """Build entries from a decoded index file, columnar or per-file."""
+        if not isinstance(data.get("paths"), list):
+            data = cls.from_dict(data).to_json()
+        paths = data["paths"]
+        if len(paths) < INTERN_PATH_LIMIT:
+            paths = list(map(sys.intern, paths))
+        return cls(paths, data)
+    
+    @classmethod
+    def from_binary(cls, data: bytes) -> 'IndexEntries':
+        """Build entries from a binary index file."""
+        magic, version, count = _INDEX_HEADER.unpack_from(data)
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+            raise ValueError("unsupported index format")
+        if not count:
+            return cls()
+        records_end = _INDEX_HEADER.size + count * _INDEX_RECORD.size
+        view = memoryview(data)
+        raw_hashes, mtimes, ctimes, sizes, inos = zip(
+            *_INDEX_RECORD.iter_unpack(view[_INDEX_HEADER.size:records_end]))
+        paths = bytes(view[records_end:]).decode("utf-8", "surrogateescape").split("\0")
+        if len(paths) != count:
+            raise ValueError("truncated index")
+        if count < INTERN_PATH_LIMIT:
+            paths = list(map(sys.intern, paths))
+        # Hashes are raw on disk but hex in memory: trees, object paths and output
+        # all use hex, so converting once here is cheaper than at every use
+        return cls(paths, {
+            "obj_hash": [raw.hex() for raw in raw_hashes],
+            "mtime_ns": [mtime or None for mtime in mtimes],
+            "ctime_ns": list(ctimes),
+            "size": list(sizes),
+            "ino": list(inos),
+        })
+    
+    def to_binary(self) -> bytes:
+        """Binary representation written to the index file."""
+        pack = _INDEX_RECORD.pack
+        columns = self.columns
+        parts = [_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, len(self.paths))]
+        for obj_hash, mtime, ctime, size, ino in zip(
+                columns["obj_hash"], columns["mtime_ns"], columns["ctime_ns"],
+                columns["size"], columns["ino"]):
+            raw_hash = bytes.fromhex(obj_hash)
+            if mtime is not None:
+                try:
+                    parts.append(pack(raw_hash, mtime, ctime, size, ino))
+                    continue
+                except struct.error:
+                    pass  # Does not fit (e.g. a 128-bit ReFS st_ino): store no stat data
+            parts.append(pack(raw_hash, 0, 0, 0, 0))
+        # Undecodable bytes in file names (os.fsdecode) round-trip as surrogates
+        parts.append("\0".join(self.paths).encode("utf-8", "surrogateescape"))
+        return b"".join(parts)
+    
+    def to_json(self) -> Dict[str, list]:
+        """Columnar representation written to the index file."""
+        data = {"paths": self.paths}
+        data.update(self.columns)
+        return data
+    
+    def _carry_stat(self, previous: 'IndexEntries'):
+        old_positions = previous._positions
+        old_hashes = previous.columns["obj_hash"]
+        for i, (path, obj_hash) in enumerate(zip(self.paths, self.columns["obj_hash"])):
+            j = old_positions.get(path)
+            if j is not None and old_hashes[j] == obj_hash:
+                for field in self.STAT_FIELDS:
+                    self.columns[field][i] = previous.columns[field][j]
+    
+    def set_stat(self, path: str, st: os.stat_result):
+        """Record the stat data of the file an entry was hashed from."""
+        i = self._positions[path]
+        columns = self.columns
+        columns["mtime_ns"][i] = st.st_mtime_ns
+        columns["ctime_ns"][i] = st.st_ctime_ns
+        columns["size"][i] = st.st_size
+        columns["ino"][i] = st.st_ino
+    
+    def smudge_racy(self, index_mtime_ns: int):
+        """Drop stat data that is not older than the index file being written.
+        
+        A file modified within the same timestamp tick as the index write
+        could otherwise keep matching its stale entry (the "racy git" problem).
+        """
+        mtimes = self.columns["mtime_ns"]
+        for i, mtime_ns in enumerate(mtimes):
+            if mtime_ns is not None and mtime_ns >= index_mtime_ns:
+                mtimes[i] = None
+    
+    def copy(self) -> 'IndexEntries':
+        """Return an independent copy (the column lists are not shared)."""
+        entries = IndexEntries.__new__(IndexEntries)
+        entries.paths = list(self.paths)
+        entries.columns = {field: list(values) for field, values in self.columns.items()}
+        entries._positions = dict(self._positions)
+        return entries
+    
+    def hash_map(self) -> Dict[str, str]:
+        """Return a path -> object hash mapping."""
+        return dict(zip(self.paths, self.columns["obj_hash"]))
+    
+    def __getitem__(self, path: str) -> Dict:
+        i = self._positions[path]
+        return {field: values[i] for field, values in self.columns.items()}
+    
+    def __contains__(self, path) -> bool:
+        return path in self._positions
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.paths)
+    
+    def __len__(self) -> int:
+        return len(self.paths)
 
 class Index:
-    """Manages the staging area with JSON format for simplicity and reliability."""
+    """Manages the staging area, stored in a compact binary format."""
     
-    def __init__(self, repo_path: Path):
+    # Index files decoded by this process: path -> ((mtime_ns, size, ino), entries).
+    # Saves go through os.replace, so every write changes the inode.
+    _load_cache: Dict[str, Tuple[Tuple[int, int, int], IndexEntries]] = {}
+    
+    def __init__(self, repo_path: Path, index_file: Optional[Path] = None):
         self.repo_path = repo_path
-        self.index_file = repo_path / ".rvs" / "index"
-        self.entries = {}
+        self.index_file = index_file or repo_path / ".rvs" / "index"
+        self.entries = IndexEntries()
+        self._mtime_ns = None
     
-    def load(self) -> Dict[str, Dict]:
-        """Load index from JSON file."""
-        if not self.index_file.exists():
-            return {}
-        
+    def load(self) -> IndexEntries:
+        """Load index from file (binary, or JSON written by older versions)."""
         try:
-            with open(self.index_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.entries = data
-                return data
-        except (IOError, json.JSONDecodeError):
+            with open(self.index_file, 'rb') as f:
+                st = os.fstat(f.fileno())
+                self._mtime_ns = st.st_mtime_ns
+                key = (st.st_mtime_ns, st.st_size, st.st_ino)
+                cached = self._load_cache.get(str(self.index_file))
+                if cached is not None and cached[0] == key:
+                    self.entries = cached[1].copy()
+                    return self.entries
+                data = f.read()
+            if data[:4] == _INDEX_MAGIC:
+                self.entries = IndexEntries.from_binary(data)
+            else:
+                self.entries = IndexEntries.from_json(_loads(data))
+            self._load_cache[str(self.index_file)] = (key, self.entries.copy())
+            return self.entries
+        except (IOError, ValueError, TypeError, AttributeError, struct.error):
             # If we can't read the index file, return empty index
-            return {}
+            return IndexEntries()
+    
+    def load_with_fs_state(self, root: Optional[Path] = None
+                           ) -> Tuple[IndexEntries, List[Tuple[str, os.stat_result]]]:
+        """Load the index together with the stat data of every working file.
+        
+        Returns the index entries as loaded (columns, not per-path dicts) and the
+        (path, stat_result) pairs of the working tree, so that is_unchanged() can
+        be given the stat without another syscall per file.
+        """
+        return self.load(), list(walk_working_tree(root or self.repo_path))
     
-    def save(self, entries: Dict[str, Dict]):
-        """Save index to JSON file."""
+    def save(self, entries: Union[IndexEntries, Dict[str, Dict]]):
+        """Save index to file in the binary format."""
+        if not isinstance(entries, IndexEntries):
+            entries = IndexEntries.from_dict(entries)
         self.entries = entries
         
         # Create a temporary file first, then rename to avoid corruption
-        temp_file = self.index_file.with_suffix('.tmp')
+        # (per-process name so concurrent writers don't clobber each other)
+        temp_file = self.index_file.with_name(f"{self.index_file.name}.tmp.{os.getpid()}")
         
         try:
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(entries, f, indent=2)
+            with open(temp_file, 'wb') as f:
+                entries.smudge_racy(os.fstat(f.fileno()).st_mtime_ns)
+                f.write(entries.to_binary())
+                f.flush()
+                os.fsync(f.fileno())
             
             # Atomically replace the index file
-            if self.index_file.exists():
-                self.index_file.unlink()
-            temp_file.rename(self.index_file)
-            
+            os.replace(temp_file, self.index_file)
+            st = os.stat(self.index_file)
+            self._mtime_ns = st.st_mtime_ns
+            self._load_cache[str(self.index_file)] = (
+                (st.st_mtime_ns, st.st_size, st.st_ino), entries.copy())
+        
         except Exception as e:
             # Clean up temp file if something went wrong
-            if temp_file.exists():
+            try:
                 temp_file.unlink()
-            raise IndexError(f"Failed to save index: {e}")
\ No newline at end of file
+            except OSError:
+                pass
+            raise IndexError(f"Failed to save index: {e}")
+    
+    def is_unchanged(self, path: str, st: Optional[os.stat_result] = None) -> Optional[str]:
+        """Return the indexed hash of path if its stat data still matches, else None.
+        
+        A None result means the file must be re-hashed. st may be passed in by
+        callers that already have it from a directory walk.
+        """
+        entries = self.entries
+        i = entries._positions.get(path)
+        if i is None:
+            return None
+        columns = entries.columns
+        mtime_ns = columns["mtime_ns"][i]
+        if mtime_ns is None or self._mtime_ns is None or mtime_ns >= self._mtime_ns:
+            return None
+        if st is None:
+            try:
+                st = os.stat(self.repo_path / path)
+            except OSError:
+                return None
+        if (st.st_mtime_ns != mtime_ns or st.st_size != columns["size"][i]
+                or st.st_ctime_ns != columns["ctime_ns"][i] or st.st_ino != columns["ino"][i]):
+            return None
+        return columns["obj_hash"][i]
@@ -3,13 +3,107 @@ Git object implementations (blob, tree, commit).
 """
 import json
 import hashlib
+import mmap
+import os
+import sys
+import tempfile
 import zlib
 import time
-from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Union, Any
 from ..exceptions import ObjectError
 
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    # Raw UTF-8 like orjson, so object ids do not depend on orjson being installed
+    _encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    
+    def _dumps(obj) -> bytes:
+        return _encode(obj).encode()
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# zstd frames start with this magic number and zlib streams never do, so
+# objects written with either algorithm can be told apart on read
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_ZSTD_LEVEL = 3
+
+COMPRESSION_ALGORITHMS = ("zlib", "zstd")
+
+# Loose objects are written often and read rarely, so like git they default
+# to the fastest zlib level; the ratio is only ~10-15% worse than level 6
+LOOSE_COMPRESSION_LEVEL = 1
+
+# Path strings are interned (so duplicates across the index, trees and the
+# working-tree scan share one object and compare by identity) only while a
+# collection stays below this size, to keep the intern table bounded
+INTERN_PATH_LIMIT = 500_000
+
+# Read size used when streaming file content into the object store
+_CHUNK_SIZE = 1 << 20
+
+# Object ids are content addresses, not a security boundary; opting out lets
+# FIPS-enabled OpenSSL builds use their fastest SHA-1 (usedforsecurity is 3.9+)
+try:
+    hashlib.sha1(usedforsecurity=False)
+    _SHA1_KWARGS = {"usedforsecurity": False}
+except TypeError:
+    _SHA1_KWARGS = {}
+
+def new_object_hasher(data: bytes = b""):
+    """Return a SHA-1 hasher for computing object ids."""
+    return hashlib.sha1(data, **_SHA1_KWARGS)
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ObjectError("zstd-compressed objects require the 'zstandard' package")
+
+def _compressor(algorithm: str, size: int = -1, level: int = LOOSE_COMPRESSION_LEVEL):
+    """Return a streaming compressor (compress/flush) for an object of `size` bytes.
+    
+    level is a zlib level (-1..9); zstd uses its own fixed level.
+    """
+    if algorithm == "zstd":
+        _require_zstandard()
+        # Spread compression of large objects across all cores
+        threads = -1 if size > _CHUNK_SIZE else 0
+        return zstandard.ZstdCompressor(level=_ZSTD_LEVEL, threads=threads).compressobj(size=size)
+    return zlib.compressobj(level)
+
+def write_compressed_object(out, data, algorithm: str = "zlib", header: bytes = b"",
+                            level: int = LOOSE_COMPRESSION_LEVEL):
+    """Compress header + data straight into a binary file; data may be any buffer."""
+    compressor = _compressor(algorithm, len(header) + len(data), level)
+    out.write(compressor.compress(header))
+    out.write(compressor.compress(data))
+    out.write(compressor.flush())
+
+def decompress_object(data: bytes) -> bytes:
+    """Decompress a stored object, detecting zlib or zstd from its first bytes."""
+    if data[:4] == _ZSTD_MAGIC:
+        _require_zstandard()
+        try:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        except zstandard.ZstdError as e:
+            raise ObjectError(f"Corrupt zstd object: {e}")
+    try:
+        return zlib.decompress(data)
+    except zlib.error as e:
+        raise ObjectError(f"Corrupt zlib object: {e}")
+
+def _format_date(timestamp: int) -> str:
+    """Format a timestamp as local 'YYYY-MM-DD HH:MM:SS' without datetime/strftime."""
+    t = time.localtime(timestamp)
+    return (f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d} "
+            f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}")
+
 class GitObject:
     """Base class for all Git objects."""
     
@@ -22,9 +116,9 @@ class GitObject:
     def hash(self) -> str:
         """Get the SHA-1 hash of this object."""
         if self._hash is None:
-            header = f"{self.obj_type} {len(self.content)}\0".encode()
-            full_content = header + self.content
-            self._hash = hashlib.sha1(full_content).hexdigest()
+            hasher = new_object_hasher(f"{self.obj_type} {len(self.content)}\0".encode())
+            hasher.update(self.content)
+            self._hash = hasher.hexdigest()
         return self._hash
     
     def serialize(self) -> bytes:
@@ -68,6 +162,77 @@ class Blob(GitObject):
             return cls(content)
         except (IOError, OSError) as e:
             raise ObjectError(f"Failed to read file {file_path}: {e}")
+    
+    @classmethod
+    def hash_and_store_from_file(cls, file_path: Union[str, Path], objects_dir: Path,
+                                 algorithm: str = "zlib",
+                                 level: int = LOOSE_COMPRESSION_LEVEL,
+                                 exists: Optional[Callable[[str], bool]] = None) -> str:
+        """Hash a file and write it as a compressed blob in a single streaming pass.
+        
+        The file is read in fixed-size chunks (or memory-mapped when larger than
+        one chunk) that are fed to both the hasher and the compressor, so the
+        full content is never held in memory. If exists(hash) reports the blob
+        as already stored, the new copy is discarded instead of replacing it.
+        Returns the hash of the stored blob.
+        """
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix="tmp_obj_", dir=str(objects_dir))
+        except OSError as e:
+            raise ObjectError(f"Failed to create temporary object in {objects_dir}: {e}")
+        
+        try:
+            with open(file_path, 'rb') as f, os.fdopen(fd, 'wb') as out:
+                size = os.fstat(f.fileno()).st_size
+                header = f"blob {size}\0".encode()
+                hasher = new_object_hasher(header)
+                compressor = _compressor(algorithm, len(header) + size, level)
+                out.write(compressor.compress(header))
+                
+                if size > _CHUNK_SIZE:
+                    # Large files are mapped instead of copied into Python buffers;
+                    # the hasher takes the whole mapping in one GIL-free call
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                            memoryview(mapped) as view:
+                        read = len(view)
+                        hasher.update(view)
+                        for start in range(0, read, _CHUNK_SIZE):
+                            out.write(compressor.compress(view[start:start + _CHUNK_SIZE]))
+                else:
+                    read = 0
+                    while True:
+                        chunk = f.read(_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        read += len(chunk)
+                        hasher.update(chunk)
+                        out.write(compressor.compress(chunk))
+                out.write(compressor.flush())
+            
+            if read != size:
+                raise ObjectError(f"File {file_path} changed while it was being read")
+            
+            obj_hash = hasher.hexdigest()
+            if exists is not None and exists(obj_hash):
+                return obj_hash  # The temporary file is removed below
+            obj_dir = objects_dir / obj_hash[:2]
+            obj_dir.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, str(obj_dir / obj_hash[2:]))
+            return obj_hash
+        except (IOError, OSError) as e:
+            raise ObjectError(f"Failed to read file {file_path}: {e}")
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+def parse_tree_content(content: bytes) -> Dict[str, str]:
+    """Parse serialized tree content into a path -> object hash mapping."""
+    # Each entry is "blob <hash> <path>"; decoding once and one comprehension
+    # keep the per-entry work to a single split
+    lines = content.decode().split('\n')
+    intern = sys.intern if len(lines) < INTERN_PATH_LIMIT else str
+    entries = (line.split(' ', 2) for line in lines)
+    return {intern(parts[2]): parts[1] for parts in entries if len(parts) == 3}
 
 class Tree(GitObject):
     """Represents a tree object."""
@@ -79,22 +244,16 @@ class Tree(GitObject):
     
     def _serialize_entries(self) -> bytes:
         """Serialize tree entries."""
-        tree_entries = []
-        for file_path, file_hash in sorted(self.entries.items()):
-            tree_entries.append(f"blob {file_hash} {file_path}")
-        return "\n".join(tree_entries).encode()
+        # One encode of the joined text is cheaper than encoding every entry
+        return "\n".join([
+            f"blob {file_hash} {file_path}"
+            for file_path, file_hash in sorted(self.entries.items())
+        ]).encode()
     
     @classmethod
     def from_content(cls, content: bytes) -> 'Tree':
         """Create a tree from serialized content."""
-        entries = {}
-        if content:
-            for line in content.decode().split('\n'):
-                if line.strip():
-                    parts = line.split(' ', 2)
-                    if len(parts) == 3:
-                        obj_type, obj_hash, filename = parts
-                        entries[filename] = obj_hash
+        entries = parse_tree_content(content)
         
         tree = cls.__new__(cls)
         tree.entries = entries
@@ -114,11 +273,18 @@ class Commit(GitObject):
         self.merge_parent = merge_parent
         self.author = author
         self.timestamp = int(time.time())
-        self.date = datetime.fromtimestamp(self.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        self._date = None
         
         content = self._serialize_commit()
         super().__init__(content, "commit")
     
+    @property
+    def date(self) -> str:
+        """Local commit time as 'YYYY-MM-DD HH:MM:SS', formatted on first use."""
+        if self._date is None:
+            self._date = _format_date(self.timestamp)
+        return self._date
+    
     def _serialize_commit(self) -> bytes:
         """Serialize commit data."""
         commit_data = {
@@ -126,22 +292,31 @@ class Commit(GitObject):
             "parent": self.parent,
             "message": self.message,
             "timestamp": self.timestamp,
-            "date": self.date,
             "author": self.author
         }
         
         if self.merge_parent:
             commit_data["merge_parent"] = self.merge_parent
         
-        return json.dumps(commit_data, indent=2).encode()
+        try:
+            return _dumps(commit_data)
+        except (TypeError, UnicodeEncodeError):
+            # Lone surrogates (a message from non-UTF-8 argv) have no UTF-8 form;
+            # escape them as \udcXX, like the stdlib json module always did
+            return json.dumps(commit_data, separators=(",", ":")).encode()
     
     @classmethod
     def from_content(cls, content: bytes) -> 'Commit':
         """Create a commit from serialized content."""
         try:
-            commit_data = json.loads(content.decode())
-        except json.JSONDecodeError as e:
-            raise ObjectError(f"Invalid commit format: {e}")
+            commit_data = _loads(content)
+        except ValueError:
+            # orjson rejects lone surrogate escapes (\udcXX), which the stdlib
+            # json module writes for messages from non-UTF-8 arguments
+            try:
+                commit_data = json.loads(content)
+            except ValueError as e:
+                raise ObjectError(f"Invalid commit format: {e}")
         
         commit = cls.__new__(cls)
         commit.tree_hash = commit_data.get("tree")
@@ -150,7 +325,7 @@ class Commit(GitObject):
         commit.merge_parent = commit_data.get("merge_parent")
         commit.author = commit_data.get("author", "RVS User")
         commit.timestamp = commit_data.get("timestamp", int(time.time()))
-        commit.date = commit_data.get("date", "")
+        commit._date = commit_data.get("date") or None
         commit.content = content
         commit.obj_type = "commit"
         commit._hash = None
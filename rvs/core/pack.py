@@ -0,0 +1,209 @@
+"""
+Packfiles: many objects stored in one file instead of one loose file each.
+
+Pack entries are always raw deflate (zlib), whatever core.compressionAlgorithm
+says; zstd only applies to loose objects. The zlib level still follows
+core.looseCompression / core.compression.
+"""
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from ..exceptions import ObjectError
+from .objects import LOOSE_COMPRESSION_LEVEL, new_object_hasher
+
+# A pack is a sequence of entries: (20-byte sha1, compressed length) followed by
+# the object ("<type> <size>\0" + content) as raw deflate. Each entry is a
+# complete deflate stream, so it can be inflated on its own from its offset.
+# The .idx file next to it lists (sha1, data offset, compressed length) for
+# every entry, so lookups never scan the pack itself.
+_ENTRY_HEADER = struct.Struct("<20sI")
+_IDX_MAGIC = b"RVSX"
+_IDX_VERSION = 1
+_IDX_HEADER = struct.Struct("<4sII")
+_IDX_RECORD = struct.Struct("<20sQI")
+
+def deflate_object(header: bytes, content, level: int = LOOSE_COMPRESSION_LEVEL) -> bytes:
+    """Compress an object (header + content) as a raw deflate stream for a pack entry."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(header) + compressor.compress(content) + compressor.flush()
+
+class PackWriter:
+    """Appends compressed objects to a temporary pack, published as one pack by write().
+    
+    Only the position of each object is kept in memory, so a large batch costs
+    no more memory than a small one.
+    """
+    
+    def __init__(self, pack_dir: Path):
+        self.pack_dir = pack_dir
+        self.entries = {}  # raw sha1 -> (data offset, compressed length) in the temp pack
+        self._file = None
+        self._temp_path = None
+        self._offset = 0
+    
+    def add(self, obj_hash: str, compressed: bytes):
+        """Append an object produced by deflate_object() to the temporary pack."""
+        raw_hash = bytes.fromhex(obj_hash)
+        if raw_hash in self.entries:
+            return
+        try:
+            if self._file is None:
+                self.pack_dir.mkdir(parents=True, exist_ok=True)
+                fd, self._temp_path = tempfile.mkstemp(prefix="tmp_pack_", dir=str(self.pack_dir))
+                self._file = os.fdopen(fd, 'wb')
+            self._file.write(_ENTRY_HEADER.pack(raw_hash, len(compressed)))
+            self._file.write(compressed)
+        except OSError as e:
+            self.discard()
+            raise ObjectError(f"Failed to write pack: {e}")
+        self._offset += _ENTRY_HEADER.size
+        self.entries[raw_hash] = (self._offset, len(compressed))
+        self._offset += len(compressed)
+    
+    def __contains__(self, obj_hash: str) -> bool:
+        return bytes.fromhex(obj_hash) in self.entries
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the hex ids of the queued objects."""
+        return (raw_hash.hex() for raw_hash in self.entries)
+    
+    def write(self) -> Optional[Path]:
+        """Publish the pack and write its index, returning the pack path (None if empty)."""
+        if not self.entries:
+            self.discard()
+            return None
+        
+        raw_hashes = sorted(self.entries)
+        name = "pack-" + new_object_hasher(b"".join(raw_hashes)).hexdigest()
+        pack_file = self.pack_dir / (name + ".pack")
+        idx_file = self.pack_dir / (name + ".idx")
+        if idx_file.exists():
+            # A pack of exactly these objects is already published
+            self.discard()
+            return pack_file
+        
+        records = [_IDX_RECORD.pack(raw_hash, *self.entries[raw_hash]) for raw_hash in raw_hashes]
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            os.replace(self._temp_path, str(pack_file))
+            self._temp_path = None
+        except OSError as e:
+            self.discard()
+            raise ObjectError(f"Failed to write pack {pack_file.name}: {e}")
+        
+        # The index is written last: a pack only becomes visible once it is complete
+        self._write_file(idx_file, [_IDX_HEADER.pack(_IDX_MAGIC, _IDX_VERSION, len(records))]
+                         + records)
+        self.entries = {}
+        self._offset = 0
+        return pack_file
+    
+    def discard(self):
+        """Drop the queued objects and remove the temporary pack."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+        if self._temp_path is not None:
+            try:
+                os.unlink(self._temp_path)
+            except OSError:
+                pass
+            self._temp_path = None
+        self.entries = {}
+        self._offset = 0
+    
+    @staticmethod
+    def _write_file(path: Path, chunks: List[bytes]):
+        temp_file = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+        try:
+            with open(temp_file, 'wb') as f:
+                f.writelines(chunks)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, path)
+        except OSError as e:
+            try:
+                temp_file.unlink()
+            except OSError:
+                pass
+            raise ObjectError(f"Failed to write pack {path.name}: {e}")
+
+class PackStore:
+    """Looks objects up across all packs in a directory."""
+    
+    def __init__(self, pack_dir: Path):
+        self.pack_dir = pack_dir
+        self._objects = None  # raw sha1 -> (pack path, data offset, compressed length)
+    
+    def _load(self) -> Dict[bytes, Tuple[Path, int, int]]:
+        if self._objects is None:
+            objects = {}
+            try:
+                idx_names = sorted(name for name in os.listdir(self.pack_dir)
+                                   if name.startswith("pack-") and name.endswith(".idx"))
+            except OSError:
+                idx_names = []
+            for idx_name in idx_names:
+                pack_file = self.pack_dir / (idx_name[:-4] + ".pack")
+                try:
+                    with open(self.pack_dir / idx_name, 'rb') as f:
+                        data = f.read()
+                    magic, version, count = _IDX_HEADER.unpack_from(data)
+                    if magic != _IDX_MAGIC or version != _IDX_VERSION:
+                        continue
+                    end = _IDX_HEADER.size + count * _IDX_RECORD.size
+                    for raw_hash, offset, length in _IDX_RECORD.iter_unpack(
+                            memoryview(data)[_IDX_HEADER.size:end]):
+                        objects[raw_hash] = (pack_file, offset, length)
+                except (OSError, struct.error):
+                    continue  # Unreadable pack index; its objects are simply not found
+            self._objects = objects
+        return self._objects
+    
+    def invalidate(self):
+        """Forget the loaded pack indexes, e.g. after writing a new pack."""
+        self._objects = None
+    
+    def _locate(self, obj_hash: str) -> Optional[Tuple[Path, int, int]]:
+        try:
+            raw_hash = bytes.fromhex(obj_hash)
+        except ValueError:
+            return None  # Not a full hex object id
+        return self._load().get(raw_hash)
+    
+    def __contains__(self, obj_hash: str) -> bool:
+        return self._locate(obj_hash) is not None
+    
+    def find_prefix(self, prefix: str) -> List[str]:
+        """Return the hex ids of the packed objects that start with an abbreviated hash."""
+        try:
+            raw_prefix = bytes.fromhex(prefix[:len(prefix) // 2 * 2])
+        except ValueError:
+            return []
+        matches = (raw_hash.hex() for raw_hash in self._load() if raw_hash.startswith(raw_prefix))
+        return [obj_hash for obj_hash in matches if obj_hash.startswith(prefix)]
+    
+    def read(self, obj_hash: str) -> Optional[bytes]:
+        """Return the uncompressed object (header + content), or None if not packed."""
+        location = self._locate(obj_hash)
+        if location is None:
+            return None
+        pack_file, offset, length = location
+        try:
+            with open(pack_file, 'rb') as f:
+                f.seek(offset)
+                return zlib.decompress(f.read(length), -zlib.MAX_WBITS)
+        except (OSError, zlib.error) as e:
+            raise ObjectError(f"Failed to read object {obj_hash} from {pack_file.name}: {e}")
@@ -1,22 +1,111 @@
 """
 Main repository implementation - improved version.
 """
+import configparser
 import json
-import hashlib
-import zlib
+import os
+import stat
+import string
+import tempfile
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
-from ..exceptions import RepositoryError, ObjectError
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union, Any
+from ..exceptions import RVSError, RepositoryError, ObjectError
 from .hooks import Hook
-from .index import Index
+from .index import Index, IndexEntries, walk_working_tree
+from .pack import PackStore, PackWriter, deflate_object
+from .objects import (COMPRESSION_ALGORITHMS, LOOSE_COMPRESSION_LEVEL, Blob, decompress_object,
+                      new_object_hasher, parse_tree_content, write_compressed_object)
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads  # Also accepts UTF-8 bytes directly
+    # Built once: json.dumps() with non-default options makes a new encoder per call.
+    # Raw UTF-8 like orjson, so object ids do not depend on orjson being installed.
+    _json_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    
+    def _json_dumps(obj) -> bytes:
+        return _json_encode(obj).encode()
+
+# During an object batch (add), a call that stores at least _PACK_MIN_OBJECTS
+# blobs of up to _PACK_MAX_OBJECT_SIZE bytes puts them in one packfile; fewer
+# or larger blobs are written as loose objects
+_PACK_MIN_OBJECTS = 16
+_PACK_MAX_OBJECT_SIZE = 1 << 20
+
+# Bound on blob-writing jobs queued per worker thread while a walk is still running
+_MAX_IN_FLIGHT_PER_WORKER = 4
+
+# Decompressed objects kept in memory by _read_object, most recently used last;
+# larger objects are not cached so the cache stays small
+_OBJECT_CACHE_ENTRIES = 1024
+_OBJECT_CACHE_MAX_SIZE = 256 * 1024
+
+# Read size for counting lines of working files, so they are never loaded whole
+_LINE_COUNT_CHUNK = 64 * 1024
+
+# Like git, a file with a NUL byte in its first 8000 bytes is binary and has no lines
+_BINARY_SNIFF_SIZE = 8000
+
+# Paths are stored with forward slashes; only Windows needs translating
+_PATH_TRANS = str.maketrans('\\', '/') if os.sep == '\\' else None
+
+def _count_lines(content: bytes) -> int:
+    """Count lines in content; a final line without a newline still counts."""
+    if content.find(b'\0', 0, _BINARY_SNIFF_SIZE) != -1:
+        return 0
+    lines = content.count(b'\n')
+    if content and not content.endswith(b'\n'):
+        lines += 1
+    return lines
+
+def _count_file_lines(path: str) -> int:
+    """Count lines in a file, reading it in fixed-size chunks into one buffer."""
+    lines = 0
+    buf = bytearray(_LINE_COUNT_CHUNK)
+    last = ord('\n')
+    with open(path, 'rb', buffering=0) as f:
+        n = f.readinto(buf)
+        if buf.find(b'\0', 0, min(n, _BINARY_SNIFF_SIZE)) != -1:
+            return 0
+        while n:
+            lines += buf.count(b'\n', 0, n)
+            last = buf[n - 1]
+            n = f.readinto(buf)
+    if last != ord('\n'):
+        lines += 1
+    return lines
+
+def _count_file_lines_safe(path: str) -> int:
+    """_count_file_lines() for a regular, non-empty file; 0 for anything else."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0
+    # Empty files need no read, and special files (e.g. a FIFO) must not be opened
+    if not stat.S_ISREG(st.st_mode) or not st.st_size:
+        return 0
+    try:
+        return _count_file_lines(path)
+    except OSError:
+        return 0
+
+def _posix(path: str) -> str:
+    """Convert a native relative path to the '/'-separated form used in the index."""
+    return path if _PATH_TRANS is None else path.translate(_PATH_TRANS)
 
 class RVS:
     """Main RVS repository class."""
     
     def __init__(self, repo_path: str = "."):
         self.repo_path = Path(repo_path).resolve()
+        self._repo_path_str = str(self.repo_path)
         rvs_path = self.repo_path / ".rvs"
         
         # Check if this is a worktree (where .rvs is a file, not a directory)
@@ -74,6 +163,20 @@ class RVS:
             self.is_worktree = False
         
         self.hooks = Hook(self.repo_path)
+        self._config = None
+        self._index = None
+        # Fanout directories known to exist, and their listed object names
+        self._obj_dirs_created = set()
+        self._known_objects = {}
+        # Parsed commits and trees by hash; objects are immutable so entries never go stale
+        self._commit_cache = {}
+        self._tree_cache = {}
+        self._object_cache = OrderedDict()
+        self._heads_dir_ready = False
+        # Line counts of blobs whose content has passed through memory, for commit stats
+        self._blob_line_counts = {}
+        self._packs = PackStore(self.objects_dir / "pack")
+        self._object_batch = None
     
     def _ensure_repo_exists(self):
         """Check if repository exists and raise error if not."""
@@ -85,38 +188,100 @@ class RVS:
         if self.is_worktree and not self.main_rvs_dir.exists():
             raise RepositoryError("Main repository not found. Worktree may be corrupted.")
     
-    def _hash_content(self, content: bytes) -> str:
-        """Generate SHA-1 hash for content."""
-        return hashlib.sha1(content).hexdigest()
+    def _get_config(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Read a value such as 'core.compressionAlgorithm' from the repository config."""
+        if self._config is None:
+            self._config = configparser.ConfigParser(strict=False, interpolation=None)
+            try:
+                self._config.read(str(self.config_file), encoding='utf-8')
+            except configparser.Error:
+                pass  # Unparseable config, fall back to defaults
+        section, _, option = key.rpartition('.')
+        return self._config.get(section, option, fallback=default)
+    
+    def _compression_algorithm(self) -> str:
+        """Algorithm used for new objects; zlib keeps objects readable everywhere."""
+        algorithm = self._get_config('core.compressionAlgorithm', 'zlib').lower()
+        return algorithm if algorithm in COMPRESSION_ALGORITHMS else 'zlib'
+    
+    def _compression_level(self) -> int:
+        """zlib level for loose objects: core.looseCompression, then core.compression."""
+        level = self._get_config('core.looseCompression',
+                                 self._get_config('core.compression'))
+        try:
+            level = int(level)
+        except (TypeError, ValueError):
+            return LOOSE_COMPRESSION_LEVEL
+        return level if -1 <= level <= 9 else LOOSE_COMPRESSION_LEVEL
     
     def _write_object(self, content: bytes, obj_type: str = "blob") -> str:
         """Write object to objects directory with compression (Git-like format)."""
-        header = f"{obj_type} {len(content)}\0".encode()
-        full_content = header + content
-        obj_hash = self._hash_content(full_content)
-        
-        obj_dir = self.objects_dir / obj_hash[:2]
-        obj_dir.mkdir(parents=True, exist_ok=True)
-        
-        obj_file = obj_dir / obj_hash[2:]
-        with open(obj_file, 'wb') as f:
-            # Compress content with zlib
-            compressed = zlib.compress(full_content)
-            f.write(compressed)
+        content = memoryview(content)
+        header = f"{obj_type} {content.nbytes}\0".encode()
+        # Hash and compress header and content separately to avoid copying content
+        hasher = new_object_hasher(header)
+        hasher.update(content)
+        obj_hash = hasher.hexdigest()
+        
+        # Objects are content-addressed: a stored object already holds this content
+        if self._object_exists(obj_hash):
+            return obj_hash
+        
+        prefix = obj_hash[:2]
+        obj_dir = self.objects_dir / prefix
+        if prefix not in self._obj_dirs_created:
+            obj_dir.mkdir(parents=True, exist_ok=True)
+            self._obj_dirs_created.add(prefix)
+        
+        # Write a temporary file and rename it into place, so an interrupted write
+        # never leaves a truncated object under the final name
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix="tmp_obj_", dir=str(self.objects_dir))
+        except OSError as e:
+            raise ObjectError(f"Failed to create temporary object in {self.objects_dir}: {e}")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write_compressed_object(f, content, self._compression_algorithm(), header,
+                                        self._compression_level())
+            os.replace(temp_path, str(obj_dir / obj_hash[2:]))
+        except OSError as e:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise ObjectError(f"Failed to write object {obj_hash}: {e}")
+        self._remember_object(obj_hash)
         
         return obj_hash
     
+    def _remember_object(self, obj_hash: str):
+        """Record an object this process has stored, so it is not written again."""
+        self._known_object_names(obj_hash[:2]).add(obj_hash[2:])
+    
+    def _known_object_names(self, prefix: str) -> set:
+        """Names of the objects known to be stored under a fanout prefix.
+        
+        The loose objects are listed once per process; every object stored since,
+        loose or packed, is added with _remember_object().
+        """
+        names = self._known_objects.get(prefix)
+        if names is None:
+            try:
+                names = set(os.listdir(self.objects_dir / prefix))
+                self._obj_dirs_created.add(prefix)
+            except FileNotFoundError:
+                names = set()
+            self._known_objects[prefix] = names
+        return names
+    
     def _read_object(self, obj_hash: str) -> Tuple[str, bytes]:
         """Read compressed object from objects directory."""
-        obj_file = self.objects_dir / obj_hash[:2] / obj_hash[2:]
-        if not obj_file.exists():
-            raise ObjectError(f"Object {obj_hash} not found")
+        cached = self._object_cache.get(obj_hash)
+        if cached is not None:
+            self._object_cache.move_to_end(obj_hash)
+            return cached
         
-        with open(obj_file, 'rb') as f:
-            compressed = f.read()
-        
-        # Decompress content
-        full_content = zlib.decompress(compressed)
+        full_content = self._load_object(obj_hash)
         
         # Parse header
         null_pos = full_content.find(b'\0')
@@ -124,74 +289,251 @@ class RVS:
         obj_type, size = header.split(' ')
         obj_content = full_content[null_pos + 1:]
         
+        # Objects are immutable, so a cached entry never needs invalidating
+        if len(obj_content) <= _OBJECT_CACHE_MAX_SIZE:
+            self._object_cache[obj_hash] = (obj_type, obj_content)
+            if len(self._object_cache) > _OBJECT_CACHE_ENTRIES:
+                self._object_cache.popitem(last=False)
+        
         return obj_type, obj_content
     
-    def _load_index(self) -> Dict[str, str]:
-        """Load the staging area index using binary format."""
-        if not self.index_file.exists():
-            return {}
+    def _load_object(self, obj_hash: str) -> bytes:
+        """Read and decompress a stored object (header + content), loose or packed.
         
-        # For worktrees, we need to load the index directly from the metadata directory
-        if self.is_worktree:
-            import json
-            try:
-                with open(self.index_file, 'r', encoding='utf-8') as f:
-                    entries = json.load(f)
-                # Convert to simple hash mapping for compatibility
-                return {path: data['obj_hash'] for path, data in entries.items()}
-            except (IOError, json.JSONDecodeError):
-                return {}
-        else:
-            # For main repositories, use the Index class
-            index = Index(self.repo_path)
-            entries = index.load()
-            # Convert to simple hash mapping for compatibility
-            return {path: data['obj_hash'] for path, data in entries.items()}
-    
-    def _save_index(self, index: Dict[str, str]):
-        """Save the staging area index using binary format."""
-        # Convert to full entry format
-        entries = {}
-        for path, obj_hash in index.items():
-            entries[path] = {'obj_hash': obj_hash}
-        
-        # For worktrees, save directly to the metadata directory
-        if self.is_worktree:
-            import json
-            with open(self.index_file, 'w', encoding='utf-8') as f:
-                json.dump(entries, f, indent=2)
-        else:
-            # For main repositories, use the Index class
-            index_obj = Index(self.repo_path)
-            index_obj.save(entries)
+        Does not touch the object cache, so it is safe to call from worker threads.
+        """
+        obj_file = self.objects_dir / obj_hash[:2] / obj_hash[2:]
+        if obj_file.exists():
+            with open(obj_file, 'rb') as f:
+                compressed = f.read()
+            
+            # Decompress content (zlib or zstd)
+            return decompress_object(compressed)
+        
+        full_content = self._packs.read(obj_hash)
+        if full_content is None:
+            raise ObjectError(f"Object {obj_hash} not found")
+        return full_content
+    
+    def _blob_line_count(self, blob_hash: str) -> Optional[int]:
+        """Line count of a stored blob, or None if it is missing or not readable."""
+        try:
+            full_content = self._load_object(blob_hash)
+        except (ObjectError, OSError):
+            return None
+        if not full_content.startswith(b"blob "):
+            return None
+        return _count_lines(full_content[full_content.find(b'\0') + 1:])
+    
+    def _load_index(self) -> Dict[str, str]:
+        """Load the staging area index as a path -> object hash mapping."""
+        # Worktrees keep their own index in the worktree metadata directory
+        self._index = Index(self.repo_path, self.index_file)
+        return self._index.load().hash_map()
+    
+    def _save_index(self, index: Dict[str, str], stats: Optional[Dict[str, os.stat_result]] = None):
+        """Save the staging area index from a path -> object hash mapping.
+        
+        stats holds the stat data of files hashed since the index was loaded.
+        """
+        previous = self._index.entries if self._index is not None else None
+        entries = IndexEntries.from_hashes(index, previous)
+        for path, st in (stats or {}).items():
+            if path in entries:
+                entries.set_stat(path, st)
+        self._index = Index(self.repo_path, self.index_file)
+        self._index.save(entries)
     
     def _normalize_path(self, file_path: str) -> str:
         """Normalize file path like Git does."""
-        # Convert to Path object and resolve relative components
-        path = Path(file_path)
-        
-        # Get the absolute path and make it relative to repo root
-        abs_path = (self.repo_path / path).resolve()
+        # Collapse './' and '../' lexically; no symlink resolution (and no syscalls) needed
+        repo_path_str = self._repo_path_str
+        abs_path = os.path.normpath(os.path.join(repo_path_str, file_path))
+        if abs_path == repo_path_str:
+            return '.'
+        root = repo_path_str.rstrip(os.sep) + os.sep
+        if abs_path.startswith(root):
+            # Convert to a relative path with forward slashes (Git style)
+            return _posix(abs_path[len(root):])
+        
+        # Not lexically inside the repo, but it may reach it through a symlinked
+        # alias (e.g. an absolute path via a linked directory): resolve it
         try:
-            rel_path = abs_path.relative_to(self.repo_path)
-            # Convert back to string with forward slashes (Git style)
-            normalized = str(rel_path).replace('\\', '/')
-            # Remove any leading './' if present
-            if normalized.startswith('./'):
-                normalized = normalized[2:]
-            return normalized
-        except ValueError:
+            rel_path = Path(abs_path).resolve().relative_to(self.repo_path)
+        except (OSError, ValueError):
             # Path is outside repo, return as-is
             return file_path
+        normalized = _posix(str(rel_path))
+        return normalized[2:] if normalized.startswith('./') else normalized
     
     def _get_file_hash(self, file_path: Path) -> str:
-        """Get hash of a file's content."""
+        """Get hash of a file's content, storing it as a blob."""
+        obj_hash = self._stream_write_blob(file_path)
+        self._remember_object(obj_hash)
+        return obj_hash
+    
+    def _stream_write_blob(self, file_path: Union[str, Path]) -> str:
+        """Hash and store a file as a blob without loading it into memory.
+        
+        A blob that is already stored, loose or packed, is not written again.
+        """
+        return Blob.hash_and_store_from_file(file_path, self.objects_dir,
+                                             self._compression_algorithm(),
+                                             self._compression_level(),
+                                             self._object_exists)
+    
+    def _deflate_blob(self, file_path: Union[str, Path]) -> Tuple[str, bytes]:
+        """Read a small file and return its blob hash and compressed pack entry."""
         try:
             with open(file_path, 'rb') as f:
                 content = f.read()
-            return self._write_object(content, "blob")
         except (IOError, OSError) as e:
             raise ObjectError(f"Failed to read file {file_path}: {e}")
+        header = f"blob {len(content)}\0".encode()
+        hasher = new_object_hasher(header)
+        hasher.update(content)
+        obj_hash = hasher.hexdigest()
+        # Counted while the content is in memory so commit never has to read it again
+        self._blob_line_counts[obj_hash] = _count_lines(content)
+        return obj_hash, deflate_object(header, content, self._compression_level())
+    
+    def _object_exists(self, obj_hash: str) -> bool:
+        """Check whether an object is stored loose, packed, or queued in the current batch."""
+        return (obj_hash[2:] in self._known_object_names(obj_hash[:2])
+                or obj_hash in self._packs
+                or (self._object_batch is not None and obj_hash in self._object_batch))
+    
+    def _find_objects_by_prefix(self, prefix: str) -> List[str]:
+        """Return the ids of all stored objects, loose or packed, that start with prefix."""
+        if len(prefix) < 2 or not all(c in string.hexdigits for c in prefix):
+            return []
+        prefix = prefix.lower()
+        loose = (prefix[:2] + name for name in self._known_object_names(prefix[:2])
+                 if name.startswith(prefix[2:]))
+        return sorted(set(loose).union(self._packs.find_prefix(prefix)))
+    
+    def _begin_object_batch(self):
+        """Start collecting small blobs to be written as a single packfile."""
+        self._object_batch = PackWriter(self.objects_dir / "pack")
+    
+    def _end_object_batch(self):
+        """Write the blobs collected since _begin_object_batch() as one packfile."""
+        batch, self._object_batch = self._object_batch, None
+        if batch is None:
+            return
+        packed = list(batch)
+        if batch.write() is not None:
+            self._packs.invalidate()
+            for obj_hash in packed:
+                self._remember_object(obj_hash)
+    
+    def _collect_blob(self, hashes: Dict[str, str], key: str, future):
+        """Record the result of a blob-writing job, queuing packable blobs in the batch."""
+        result = future.result()
+        if isinstance(result, tuple):
+            obj_hash, compressed = result
+            if not self._object_exists(obj_hash):
+                self._object_batch.add(obj_hash, compressed)
+        else:
+            # Streamed to a loose object by a worker; recorded here, on the main thread
+            obj_hash = result
+            self._remember_object(obj_hash)
+        hashes[key] = obj_hash
+    
+    def _store_blobs(self, files: Iterable[Tuple[str, Union[str, Path], int]]) -> Dict[str, str]:
+        """Store files given as (key, path, size) as blobs, returning key -> hash.
+        
+        Jobs go to a thread pool while files is still being produced (e.g. by a
+        directory walk), so walking overlaps reading, hashing and compression;
+        at most _MAX_IN_FLIGHT_PER_WORKER jobs per worker are outstanding. Inside
+        an object batch, small files go to the batch's packfile once at least
+        _PACK_MIN_OBJECTS of them have been seen.
+        """
+        hashes = {}
+        in_flight = deque()
+        max_in_flight = _MAX_IN_FLIGHT_PER_WORKER * (os.cpu_count() or 1)
+        batch = self._object_batch
+        packing = False
+        pending_small = []  # Small files seen before enough of them to pack
+        
+        # hashlib and zlib release the GIL on large buffers, so threads scale
+        self._compression_algorithm()  # Load the config before workers need it
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            def submit(write, key, path):
+                in_flight.append((key, executor.submit(write, path)))
+                while len(in_flight) > max_in_flight:
+                    self._collect_blob(hashes, *in_flight.popleft())
+            
+            for key, path, size in files:
+                if batch is None or size > _PACK_MAX_OBJECT_SIZE:
+                    submit(self._stream_write_blob, key, path)
+                elif packing:
+                    submit(self._deflate_blob, key, path)
+                else:
+                    pending_small.append((key, path))
+                    if len(pending_small) >= _PACK_MIN_OBJECTS:
+                        packing = True
+                        for pending_key, pending_path in pending_small:
+                            submit(self._deflate_blob, pending_key, pending_path)
+                        del pending_small[:]
+            
+            # Too few small files for a pack: write them as loose objects
+            for key, path in pending_small:
+                submit(self._stream_write_blob, key, path)
+            while in_flight:
+                self._collect_blob(hashes, *in_flight.popleft())
+        return hashes
+    
+    def _get_working_file_hashes(
+            self, files: Iterable[Tuple[str, Union[str, Path], Optional[os.stat_result]]],
+            stats: Dict[str, os.stat_result]) -> Dict[str, str]:
+        """Get hashes of working files given as (rel_path, full_path, stat or None).
+        
+        Files whose index entry is unchanged are not read; the rest are hashed in parallel.
+        """
+        hashes = {}
+        
+        def changed_files():
+            for rel_path, file_path, st in files:
+                if st is None:
+                    try:
+                        st = os.stat(file_path)
+                    except OSError as e:
+                        raise ObjectError(f"Failed to read file {file_path}: {e}")
+                if self._index is not None:
+                    cached_hash = self._index.is_unchanged(rel_path, st)
+                    if cached_hash is not None:
+                        hashes[rel_path] = cached_hash
+                        continue
+                stats[rel_path] = st
+                yield rel_path, file_path, st.st_size
+        
+        hashes.update(self._store_blobs(changed_files()))
+        return hashes
+    
+    def _refresh_index_stat(self, index: Dict[str, str], working_files: Dict[str, str],
+                            stats: Dict[str, os.stat_result]):
+        """Record stat data for re-hashed files that turned out to match the index.
+        
+        Like git's index refresh, this lets the next status skip those files.
+        Failing to write the index (e.g. a read-only repository) is not an error.
+        """
+        refreshed = [path for path, st in stats.items()
+                     if path in index and index[path] == working_files[path]]
+        if not refreshed:
+            return
+        entries = self._index.entries
+        for path in refreshed:
+            entries.set_stat(path, stats[path])
+        try:
+            self._index.save(entries)
+        except RVSError:
+            pass
+    
+    def _get_working_file_hash(self, rel_path: str, file_path: Path,
+                               stats: Dict[str, os.stat_result]) -> str:
+        """Get hash of a working file, skipping the read if its index entry is unchanged."""
+        return self._get_working_file_hashes([(rel_path, file_path, None)], stats)[rel_path]
     
     def init(self):
         """Initialize a new RVS repository."""
@@ -241,41 +583,61 @@ class RVS:
         """Add files to the staging area."""
         self._ensure_repo_exists()
         index = self._load_index()
+        stats = {}
         
-        for file_path in file_paths:
-            # Handle special case for current directory
-            if file_path == ".":
-                # Add all files in current directory recursively
-                added_files = self._add_directory_recursive(self.repo_path, index)
-                if not added_files:
-                    print(f"warning: no files found in directory {file_path}")
-                continue
-            
-            full_path = self.repo_path / file_path
-            
-            if not full_path.exists():
-                print(f"fatal: pathspec '{file_path}' did not match any files")
-                continue
+        # Small new blobs from directory adds are collected into one packfile
+        self._begin_object_batch()
+        try:
+            for file_path in file_paths:
+                # Handle special case for current directory
+                if file_path == ".":
+                    # Add all files in current directory recursively
+                    added_files = self._add_directory_recursive(self.repo_path, index, stats)
+                    if not added_files:
+                        print(f"warning: no files found in directory {file_path}")
+                    continue
+                
+                full_path = self.repo_path / file_path
+                
+                if not full_path.exists():
+                    print(f"fatal: pathspec '{file_path}' did not match any files")
+                    continue
+                
+                if full_path.is_file():
+                    # Normalize the path (remove ./ prefix, resolve relative paths)
+                    normalized_path = self._normalize_path(file_path)
+                    file_hash = self._get_working_file_hash(normalized_path, full_path, stats)
+                    index[normalized_path] = file_hash
+                    # Git add is silent by default
+                elif full_path.is_dir():
+                    # Recursively add all files in the directory
+                    added_files = self._add_directory_recursive(full_path, index, stats)
+                    if not added_files:
+                        print(f"warning: no files found in directory {file_path}")
+                else:
+                    print(f"warning: {file_path} is not a file or directory, skipping")
             
-            if full_path.is_file():
-                # Normalize the path (remove ./ prefix, resolve relative paths)
-                normalized_path = self._normalize_path(file_path)
-                file_hash = self._get_file_hash(full_path)
-                index[normalized_path] = file_hash
-                # Git add is silent by default
-            elif full_path.is_dir():
-                # Recursively add all files in the directory
-                added_files = self._add_directory_recursive(full_path, index)
-                if not added_files:
-                    print(f"warning: no files found in directory {file_path}")
-            else:
-                print(f"warning: {file_path} is not a file or directory, skipping")
-        
-        self._save_index(index)
+            # The packfile must exist before the index refers to its blobs
+            self._end_object_batch()
+        finally:
+            if self._object_batch is not None:
+                self._object_batch.discard()
+                self._object_batch = None
+        
+        self._save_index(index, stats)
     
-    def _add_directory_recursive(self, dir_path: Path, index: Dict[str, str]) -> List[str]:
+    def _iter_tracked_files(self, dir_path: Path) -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield (path relative to repo root, stat) for every working file under dir_path."""
+        rel_dir = _posix(str(dir_path.relative_to(self.repo_path)))
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+        return walk_working_tree(dir_path, prefix)
+    
+    def _add_directory_recursive(self, dir_path: Path, index: Dict[str, str],
+                                 stats: Optional[Dict[str, os.stat_result]] = None) -> List[str]:
         """Recursively add all files in a directory to the index."""
         added_files = []
+        if stats is None:
+            stats = {}
         
         # Get current commit files to check for deletions
         current_branch = self._get_current_branch()
@@ -289,24 +651,23 @@ class RVS:
             except Exception:
                 pass  # No commits yet or error reading
         
-        # Use rglob to recursively find all files
-        working_files = set()
-        for file_path in dir_path.rglob('*'):
-            if file_path.is_file():
-                # Get relative path from repo root
-                rel_path = file_path.relative_to(self.repo_path)
-                rel_path_str = str(rel_path).replace('\\', '/')  # Normalize path separators
-                
-                # Skip .rvs file/directory and its contents
-                if rel_path_str == '.rvs' or rel_path_str.startswith('.rvs/'):
-                    continue
-                
-                working_files.add(rel_path_str)
-                
-                # Add to index
-                file_hash = self._get_file_hash(file_path)
-                index[rel_path_str] = file_hash
-                added_files.append(rel_path_str)
+        # Recursively find all files (.rvs is pruned by the walk); the walk is
+        # consumed while earlier files are already being hashed
+        repo_path_str = self._repo_path_str
+        walked = []
+        
+        def walk():
+            for rel_path_str, st in self._iter_tracked_files(dir_path):
+                walked.append(rel_path_str)
+                yield rel_path_str, os.path.join(repo_path_str, rel_path_str), st
+        
+        file_hashes = self._get_working_file_hashes(walk(), stats)
+        working_files = set(walked)
+        
+        # Add to index
+        for rel_path_str in walked:
+            index[rel_path_str] = file_hashes[rel_path_str]
+            added_files.append(rel_path_str)
         
         # Handle deletions: remove files from index that are tracked but missing from working directory
         # This only applies when adding the entire directory (like "git add .")
@@ -334,7 +695,7 @@ class RVS:
         standalone_files = []
         
         for file_path in file_paths:
-            parts = Path(file_path).parts
+            parts = file_path.split('/')
             if len(parts) > 1:
                 # File is in a subdirectory
                 top_dir = parts[0]
@@ -398,21 +759,16 @@ class RVS:
         if not has_commits:
             print("\nNo commits yet")
         
-        # Get staged files
-        index = self._load_index()
+        # Get staged files together with the stat data of all files in working directory
+        self._index = Index(self.repo_path, self.index_file)
+        entries, fs_state = self._index.load_with_fs_state()
+        index = entries.hash_map()
         
-        # Get all files in working directory
-        working_files = {}
-        for file_path in self.repo_path.rglob('*'):
-            if file_path.is_file():
-                rel_path = file_path.relative_to(self.repo_path)
-                rel_path_str = str(rel_path).replace('\\', '/')  # Normalize path separators
-                
-                # Skip .rvs file/directory and its contents
-                if rel_path_str == '.rvs' or rel_path_str.startswith('.rvs/'):
-                    continue
-                
-                working_files[rel_path_str] = self._get_file_hash(file_path)
+        stats = {}
+        working_files = self._get_working_file_hashes(
+            [(rel_path_str, os.path.join(self._repo_path_str, rel_path_str), st)
+             for rel_path_str, st in fs_state], stats)
+        self._refresh_index_stat(index, working_files, stats)
         
         # Categorize files
         staged_files = set(index.keys())
@@ -516,7 +872,7 @@ class RVS:
             commits.append({
                 'hash': commit_hash,
                 'message': commit_data['message'],
-                'date': commit_data['date'],
+                'timestamp': commit_data.get('timestamp', 0),
                 'parents': [commit_data['parent']] if commit_data.get('parent') else []
             })
             commit_hash = commit_data.get('parent')
@@ -527,6 +883,11 @@ class RVS:
             log_cmd = LogCommand(self)
             log_cmd._print_commit_graph(commits, current_branch)
         else:
+            # Timezone offset for dates, looked up once rather than per commit
+            tz_offset = time.strftime("%z") or "+0000"
+            # Branch tips, read once rather than rescanning refs for every commit
+            branch_heads = self._branch_heads()
+            
             # Print without graph
             for i, commit in enumerate(commits):
                 commit_hash = commit['hash']
@@ -547,12 +908,9 @@ class RVS:
                             branch_info = f" (HEAD -> {current_branch})"
                     else:
                         # Check if this commit is pointed to by any branch
-                        for branch_file in self.heads_dir.iterdir():
-                            if branch_file.is_file():
-                                with open(branch_file, 'r') as f:
-                                    if f.read().strip() == commit_hash:
-                                        branch_info = f" ({branch_file.name})"
-                                        break
+                        branch_name = branch_heads.get(commit_hash)
+                        if branch_name is not None:
+                            branch_info = f" ({branch_name})"
                     
                     print(f"{short_hash}{branch_info} {message}")
                 else:
@@ -567,30 +925,20 @@ class RVS:
                             branch_info = f" (HEAD -> {current_branch})"
                     else:
                         # Check if this commit is pointed to by any branch
-                        for branch_file in self.heads_dir.iterdir():
-                            if branch_file.is_file():
-                                with open(branch_file, 'r') as f:
-                                    if f.read().strip() == commit_hash:
-                                        branch_info = f" ({branch_file.name})"
-                                        break
+                        branch_name = branch_heads.get(commit_hash)
+                        if branch_name is not None:
+                            branch_info = f" ({branch_name})"
                     
                     print(f"commit {commit_hash}{branch_info}")
                     print(f"Author: {commit.get('author', 'RVS User')} <rvs@example.com>")
                     
                     # Format date like Git: "Sat Aug 16 13:43:18 2025 -0500"
-                    import datetime
-                    import time
                     timestamp = commit.get('timestamp', 0)
                     if timestamp == 0:
                         # Fallback to current time if timestamp is missing
                         timestamp = int(time.time())
                     
-                    dt = datetime.datetime.fromtimestamp(timestamp)
-                    # Get timezone offset
-                    tz_offset = time.strftime("%z")
-                    if not tz_offset:
-                        tz_offset = "+0000"
-                    
+                    dt = datetime.fromtimestamp(timestamp)
                     formatted_date = dt.strftime("%a %b %d %H:%M:%S %Y ") + tz_offset
                     
                     print(f"Date:   {formatted_date}")
@@ -601,11 +949,36 @@ class RVS:
     
     def _read_commit(self, commit_hash: str) -> Dict[str, Any]:
         """Read a commit object."""
-        obj_type, content = self._read_object(commit_hash)
-        if obj_type != "commit":
-            raise ObjectError(f"Expected commit object, got {obj_type}")
-        
-        return json.loads(content.decode())
+        commit_data = self._commit_cache.get(commit_hash)
+        if commit_data is None:
+            obj_type, content = self._read_object(commit_hash)
+            if obj_type != "commit":
+                raise ObjectError(f"Expected commit object, got {obj_type}")
+            
+            commit_data = self._parse_commit(content)
+            self._commit_cache[commit_hash] = commit_data
+        # Callers may modify the result, so hand out a copy
+        return dict(commit_data)
+    
+    def _parse_commit(self, content: bytes) -> Dict[str, Any]:
+        """Decode the content of a commit object."""
+        try:
+            return _json_loads(content)
+        except json.JSONDecodeError:
+            # orjson rejects lone surrogate escapes (\udcXX), which the stdlib
+            # json module writes for messages from non-UTF-8 arguments
+            return json.loads(content)
+    
+    def _write_commit(self, commit_data: Dict[str, Any]) -> str:
+        """Serialize commit metadata and store it as a commit object."""
+        # Compact JSON: commits are parsed by code, not read by people
+        try:
+            content = _json_dumps(commit_data)
+        except (TypeError, UnicodeEncodeError):
+            # Lone surrogates (a message from non-UTF-8 argv) have no UTF-8 form;
+            # escape them as \udcXX, like the stdlib json module always did
+            content = json.dumps(commit_data, separators=(",", ":")).encode()
+        return self._write_object(content, "commit")
     
     def _get_current_branch(self) -> str:
         """Get current branch name."""
@@ -624,6 +997,19 @@ class RVS:
         
         return "main"
     
+    def _branch_heads(self) -> Dict[str, str]:
+        """Map each branch tip commit to the name of the first branch found pointing at it."""
+        heads = {}
+        try:
+            with os.scandir(self.heads_dir) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.startswith('.'):
+                        with open(entry.path, 'r') as f:
+                            heads.setdefault(f.read().strip(), entry.name)
+        except FileNotFoundError:
+            pass
+        return heads
+    
     def _get_branch_commit(self, branch: str) -> Optional[str]:
         """Get the latest commit hash for a branch."""
         # Special case for detached HEAD
@@ -661,47 +1047,28 @@ class RVS:
             except Exception:
                 pass  # No parent or error reading parent
         
-        # Check if there are any actual changes to commit
-        has_changes = False
-        
-        # Check for new files or modified files in index
-        for file_path, file_hash in index.items():
-            if file_path not in parent_files or parent_files[file_path] != file_hash:
-                has_changes = True
-                break
-        
-        # Check for deleted files (files in parent but not in index)
-        if not has_changes:
-            for file_path in parent_files.keys():
-                if file_path not in index:
-                    # This would be a deletion, but we need to check if the file still exists in working directory
-                    # If it exists in working dir but not in index, it's not staged for deletion
-                    file_full_path = self.repo_path / file_path
-                    if not file_full_path.exists():
-                        has_changes = True
-                        break
+        # Check if there are any actual changes to commit: new or modified files in
+        # the index, or files in parent but not in index that are also gone from the
+        # working directory (if still there, they are not staged for deletion)
+        has_changes = (
+            any(parent_files.get(file_path) != file_hash for file_path, file_hash in index.items())
+            or any(file_path not in index
+                   and not os.path.exists(os.path.join(self._repo_path_str, file_path))
+                   for file_path in parent_files)
+        )
         
         # If no changes, show status-like output and return
         if not has_changes:
             # Show current status like Git does
             print(f"On branch {current_branch}")
             
-            # Get all files in working directory
-            working_files = {}
-            for file_path in self.repo_path.rglob('*'):
-                if file_path.is_file():
-                    rel_path = file_path.relative_to(self.repo_path)
-                    rel_path_str = str(rel_path).replace('\\', '/')  # Normalize path separators
-                    
-                    # Skip .rvs file/directory and its contents
-                    if rel_path_str == '.rvs' or rel_path_str.startswith('.rvs/'):
-                        continue
-                    
-                    working_files[rel_path_str] = self._get_file_hash(file_path)
+            # Untracked files only need names, so nothing is read or hashed here
+            working_file_names = [rel_path_str for rel_path_str, _ in
+                                  self._iter_tracked_files(self.repo_path)]
             
             # Find untracked files
             untracked_files = []
-            for file_path in working_files.keys():
+            for file_path in working_file_names:
                 if file_path not in parent_files and file_path not in index:
                     untracked_files.append(file_path)
             
@@ -723,58 +1090,62 @@ class RVS:
             print("Commit aborted by pre-commit hook")
             return
         
-        # Start with files from parent commit (if any)
-        commit_files = parent_files.copy()
-        
-        # Update with staged files (this creates a cumulative snapshot)
-        commit_files.update(index)
-        
-        # Calculate file statistics
-        files_changed = 0
+        # Classify paths with set operations on the key views instead of a
+        # Python-level membership test per path; sorted like git prints them
+        new_files = sorted(index.keys() - parent_files.keys())
+        deleted_files = sorted(parent_files.keys() - index.keys())
+        # Modified files count as changed; a full implementation would diff them
+        # for insertions/deletions. One pass over the index: new paths get their
+        # own hash back from get() and drop out without a key intersection.
+        parent_hash = parent_files.get
+        modified_files = [file_path for file_path, file_hash in index.items()
+                          if parent_hash(file_path, file_hash) != file_hash]
+        files_changed = len(new_files) + len(modified_files) + len(deleted_files)
         insertions = 0
         deletions = 0
-        new_files = []
-        modified_files = []
-        deleted_files = []
         
-        # Check files in index (new or modified)
-        for file_path in index.keys():
-            if file_path not in parent_files:
-                # New file
-                new_files.append(file_path)
-                files_changed += 1
-                # For new files, count lines as insertions
-                try:
-                    file_full_path = self.repo_path / file_path
-                    if file_full_path.exists():
-                        with open(file_full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = len(f.readlines())
-                            insertions += lines
-                except:
-                    pass  # If we can't read the file, just skip line counting
-            elif index[file_path] != parent_files[file_path]:
-                # Modified file
-                modified_files.append(file_path)
-                files_changed += 1
-                # For simplicity, we'll just count it as 0 insertions/deletions
-                # A full implementation would need to diff the files
-        
-        # Check for deleted files (files in parent but not in index)
-        for file_path in parent_files.keys():
-            if file_path not in index:
-                # Deleted file
-                deleted_files.append(file_path)
-                files_changed += 1
-                # For deleted files, count lines as deletions
-                try:
-                    # We can't read the deleted file from working directory,
-                    # but we can read it from the parent commit
-                    obj_type, content = self._read_object(parent_files[file_path])
-                    if obj_type == "blob":
-                        lines = len(content.decode('utf-8', errors='ignore').splitlines())
-                        deletions += lines
-                except:
-                    pass  # If we can't read the file, just skip line counting
+        # For new files, count lines as insertions; files not counted while staging
+        # are read from the working tree, several at a time since this is I/O bound
+        uncounted = []
+        for file_path in new_files:
+            lines = self._blob_line_counts.get(index[file_path])
+            if lines is None:
+                uncounted.append(os.path.join(self._repo_path_str, file_path))
+            else:
+                insertions += lines
+        if len(uncounted) < 2:
+            insertions += sum(map(_count_file_lines_safe, uncounted))
+        else:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                insertions += sum(executor.map(_count_file_lines_safe, uncounted))
+        
+        # For deleted files (in parent but not in index), count lines as deletions.
+        # We can't read the deleted file from working directory, but we can read it
+        # from the parent commit; missing objects are skipped.
+        unread = []
+        for file_path in deleted_files:
+            blob_hash = parent_files[file_path]
+            lines = self._blob_line_counts.get(blob_hash)
+            if lines is not None:
+                deletions += lines
+            elif self._object_exists(blob_hash):
+                unread.append(blob_hash)
+        # Blobs are decompressed in worker threads (zlib releases the GIL)
+        if len(unread) < 2:
+            counts = list(map(self._blob_line_count, unread))
+        else:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                counts = list(executor.map(self._blob_line_count, unread))
+        for blob_hash, lines in zip(unread, counts):
+            if lines is not None:
+                self._blob_line_counts[blob_hash] = lines
+                deletions += lines
+        
+        # Start with files from parent commit (if any) and update with staged files
+        # (this creates a cumulative snapshot). parent_files is a private copy from
+        # _read_tree and is not needed after the statistics, so update it in place.
+        commit_files = parent_files
+        commit_files.update(index)
         
         # Create tree from all files (parent + staged)
         tree_hash = self._create_tree(commit_files)
@@ -803,80 +1174,82 @@ class RVS:
         root_commit_text = " (root-commit)" if is_root_commit else ""
         short_hash = commit_hash[:7]
         
-        print(f"[{current_branch}{root_commit_text} {short_hash}] {message}")
+        # The report is collected and written with one print, not one per file
+        report = [f"[{current_branch}{root_commit_text} {short_hash}] {message}"]
         
         # File statistics
         if files_changed > 0:
-            stats_parts = []
             if files_changed == 1:
-                stats_parts.append("1 file changed")
+                summary = " 1 file changed"
             else:
-                stats_parts.append(f"{files_changed} files changed")
-            
+                summary = f" {files_changed} files changed"
             if insertions > 0:
-                stats_parts.append(f"{insertions} insertions(+)")
+                summary += f", {insertions} insertions(+)"
             if deletions > 0:
-                stats_parts.append(f"{deletions} deletions(-)")
-            
-            print(f" {', '.join(stats_parts)}")
+                summary += f", {deletions} deletions(-)"
+            report.append(summary)
         
         # Show file changes
-        for file_path in new_files:
-            print(f" create mode 100644 {file_path}")
-        for file_path in deleted_files:
-            print(f" delete mode 100644 {file_path}")
+        report.extend([f" create mode 100644 {file_path}" for file_path in new_files])
+        report.extend([f" delete mode 100644 {file_path}" for file_path in deleted_files])
+        print("\n".join(report))
     
     def _create_tree(self, file_dict: Dict[str, str]) -> str:
         """Create a tree object from a dictionary of files."""
-        tree_entries = []
-        
-        for file_path, file_hash in sorted(file_dict.items()):
-            # Simple tree format: "blob <hash> <filename>"
-            tree_entries.append(f"blob {file_hash} {file_path}")
-        
-        tree_content = "\n".join(tree_entries).encode()
+        # Simple tree format: "blob <hash> <filename>" per line. Formatting str
+        # entries and encoding the joined result once beats encoding per entry.
+        tree_content = "\n".join([f"blob {file_hash} {file_path}"
+                                  for file_path, file_hash in sorted(file_dict.items())]).encode()
         return self._write_object(tree_content, "tree")
     
     def _read_tree(self, tree_hash: str) -> Dict[str, str]:
         """Read a tree object and return file dictionary."""
+        file_dict = self._tree_cache.get(tree_hash)
+        if file_dict is not None:
+            return dict(file_dict)
+        
         obj_type, content = self._read_object(tree_hash)
         if obj_type != "tree":
             raise ObjectError(f"Expected tree object, got {obj_type}")
         
-        file_dict = {}
-        if content:
-            for line in content.decode().split('\n'):
-                if line.strip():
-                    parts = line.split(' ', 2)
-                    if len(parts) == 3:
-                        obj_type, obj_hash, filename = parts
-                        file_dict[filename] = obj_hash
+        file_dict = parse_tree_content(content)
         
-        return file_dict
+        self._tree_cache[tree_hash] = file_dict
+        return dict(file_dict)
     
     def _create_commit(self, tree_hash: str, message: str, parent: Optional[str] = None) -> str:
         """Create a commit object."""
-        timestamp = int(time.time())
-        date_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
-        
+        # The date is formatted from the timestamp when shown, not stored
         commit_data = {
             "tree": tree_hash,
             "parent": parent,
             "message": message,
-            "timestamp": timestamp,
-            "date": date_str,
+            "timestamp": int(time.time()),
             "author": "RVS User"
         }
         
-        commit_content = json.dumps(commit_data, indent=2).encode()
-        return self._write_object(commit_content, "commit")
+        return self._write_commit(commit_data)
     
     def _set_branch_commit(self, branch: str, commit_hash: str):
         """Set the commit hash for a branch."""
-        self.heads_dir.mkdir(parents=True, exist_ok=True)
+        if not self._heads_dir_ready:
+            self.heads_dir.mkdir(parents=True, exist_ok=True)
+            self._heads_dir_ready = True
         branch_file = self.heads_dir / branch
-        with open(branch_file, 'w') as f:
-            f.write(commit_hash)
+        # Write a temporary file and rename it over the ref, so readers never see a
+        # partly written ref. Branch names cannot start with '.', so the temporary
+        # name is never mistaken for a branch.
+        temp_file = branch_file.with_name(f".{branch_file.name}.tmp.{os.getpid()}")
+        try:
+            with open(temp_file, 'w') as f:
+                f.write(commit_hash)
+            os.replace(temp_file, branch_file)
+        except OSError as e:
+            try:
+                temp_file.unlink()
+            except OSError:
+                pass
+            raise RepositoryError(f"Failed to update branch {branch}: {e}")
     
     def branch(self, branch_name: str = None, list_branches: bool = False):
         """Create or list branches."""
@@ -885,12 +1258,18 @@ class RVS:
         if list_branches or branch_name is None:
             current_branch = self._get_current_branch()
             
-            if self.heads_dir.exists():
-                for branch_file in self.heads_dir.iterdir():
-                    prefix = "* " if branch_file.name == current_branch else "  "
-                    print(f"{prefix}{branch_file.name}")
-            else:
+            # One scandir pass yields bare names; no Path object per branch
+            try:
+                with os.scandir(self.heads_dir) as it:
+                    branch_names = sorted(entry.name for entry in it
+                                          if not entry.name.startswith('.'))
+            except FileNotFoundError:
                 print(f"* {current_branch}")
+                return
+            
+            for name in branch_names:
+                prefix = "* " if name == current_branch else "  "
+                print(prefix + name)
         
         elif branch_name:
             # Create new branch
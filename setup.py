@@ -24,6 +24,12 @@ setup(
     install_requires=[
         # Add any dependencies here if needed
     ],
+    extras_require={
+        # Optional accelerators; RVS falls back to the standard library without them
+        "fast": ["orjson"],
+        # Needed to read or write repositories using core.compressionAlgorithm = zstd
+        "zstd": ["zstandard"],
+    },
     entry_points={
         "console_scripts": [
             "rvs=rvs.cli:main",
@@ -0,0 +1,78 @@
+"""
+Tests for hook command resolution.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import rvs.core.hooks
+from rvs.core.hooks import Hook
+
+
+@mock.patch.object(rvs.core.hooks, "_IS_WINDOWS", True)
+class PythonHookCommandTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, str(self.tmp), True)
+        self.hook = Hook(self.tmp)
+        rvs.core.hooks._which.cache_clear()
+        self.addCleanup(rvs.core.hooks._which.cache_clear)
+    
+    def resolve(self, name: str, content: str):
+        hook_file = self.tmp / name
+        hook_file.write_text(content)
+        return self.hook._resolve_hook_command(hook_file, ["arg"])
+    
+    def test_python_hooks_use_python_from_path(self):
+        with mock.patch("shutil.which", return_value="C:\\Tools\\python.exe"):
+            for name, content in (("pre-commit", "#!/usr/bin/env python\n"),
+                                  ("post-commit.py", "print('hi')\n")):
+                cmd = self.resolve(name, content)
+                self.assertEqual(cmd, ["C:\\Tools\\python.exe", str(self.tmp / name), "arg"])
+    
+    def test_falls_back_to_plain_python(self):
+        with mock.patch("shutil.which", return_value=None):
+            self.assertEqual(self.resolve("pre-commit.py", "pass\n")[0], "python")
+
+
+@unittest.skipIf(rvs.core.hooks._IS_WINDOWS, "POSIX permission check")
+class HookPermissionTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, str(self.tmp), True)
+        hooks_dir = self.tmp / ".rvs" / "hooks"
+        hooks_dir.mkdir(parents=True)
+        self.marker = self.tmp / "ran"
+        self.hook_file = hooks_dir / "pre-commit"
+        self.hook_file.write_text(f"#!/bin/sh\ntouch '{self.marker}'\n")
+        self.hook_file.chmod(0o755)
+    
+    def test_runs_executable_hook(self):
+        self.assertTrue(Hook(self.tmp).run_hook("pre-commit"))
+        self.assertTrue(self.marker.exists())
+    
+    def test_skips_hook_this_user_cannot_execute(self):
+        # e.g. mode 0o744 on a hook owned by another user: x bits set, but not for us
+        with mock.patch("os.access", return_value=False) as access:
+            self.assertTrue(Hook(self.tmp).run_hook("pre-commit"))
+        access.assert_called_once_with(str(self.hook_file), os.X_OK)
+        self.assertFalse(self.marker.exists())
+    
+    def test_reinstalling_samples_makes_existing_hooks_executable(self):
+        self.hook_file.chmod(0o644)
+        old_umask = os.umask(0o077)
+        try:
+            Hook(self.tmp).install_sample_hooks()
+        finally:
+            os.umask(old_umask)
+        self.assertEqual(self.hook_file.stat().st_mode & 0o777, 0o755)
+        self.assertEqual((self.hook_file.parent / "post-commit").stat().st_mode & 0o777, 0o755)
+
+
+if __name__ == "__main__":
+    unittest.main()
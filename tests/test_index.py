@@ -0,0 +1,34 @@
+"""
+Tests for the binary index format.
+"""
+import os
+import unittest
+
+from rvs.core.index import IndexEntries
+
+
+class BinaryIndexTest(unittest.TestCase):
+    
+    def test_undecodable_file_names_round_trip(self):
+        path = os.fsdecode(b"dir/bad\xffname.txt")
+        entries = IndexEntries.from_hashes({path: "a" * 40, "ok.txt": "b" * 40})
+        loaded = IndexEntries.from_binary(entries.to_binary())
+        self.assertEqual(loaded.hash_map(), {path: "a" * 40, "ok.txt": "b" * 40})
+    
+    def test_stat_data_that_does_not_fit_is_dropped(self):
+        entries = IndexEntries.from_hashes({"big.txt": "a" * 40, "small.txt": "b" * 40})
+        st = os.stat(__file__)
+        entries.set_stat("small.txt", st)
+        entries.set_stat("big.txt", st)
+        entries.columns["ino"][entries._positions["big.txt"]] = 1 << 100  # 128-bit ReFS id
+        
+        loaded = IndexEntries.from_binary(entries.to_binary())
+        self.assertEqual(loaded.hash_map(), entries.hash_map())
+        self.assertIsNone(loaded.columns["mtime_ns"][loaded._positions["big.txt"]])
+        small = loaded._positions["small.txt"]
+        self.assertEqual(loaded.columns["mtime_ns"][small], st.st_mtime_ns)
+        self.assertEqual(loaded.columns["ino"][small], st.st_ino)
+
+
+if __name__ == "__main__":
+    unittest.main()
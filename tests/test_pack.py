@@ -0,0 +1,52 @@
+"""
+Tests for packfile writing and lookup.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from rvs.core.objects import new_object_hasher
+from rvs.core.pack import PackStore, PackWriter, deflate_object
+
+
+def packed_object(content: bytes):
+    header = f"blob {len(content)}\0".encode()
+    obj_hash = new_object_hasher(header + content).hexdigest()
+    return obj_hash, header + content, deflate_object(header, content)
+
+
+class PackWriterTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.pack_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, str(self.pack_dir), True)
+    
+    def test_objects_are_streamed_to_disk_not_kept_in_memory(self):
+        writer = PackWriter(self.pack_dir)
+        objects = [packed_object(f"blob {i}\n".encode()) for i in range(20)]
+        for obj_hash, _, compressed in objects:
+            writer.add(obj_hash, compressed)
+        
+        self.assertTrue(all(isinstance(location, tuple) for location in writer.entries.values()))
+        self.assertEqual(len(os.listdir(self.pack_dir)), 1)  # Only the temporary pack
+        
+        pack_file = writer.write()
+        self.assertEqual(sorted(os.listdir(self.pack_dir)),
+                         [pack_file.name[:-5] + ".idx", pack_file.name])
+        store = PackStore(self.pack_dir)
+        for obj_hash, raw, _ in objects:
+            self.assertEqual(store.read(obj_hash), raw)
+    
+    def test_discard_removes_temporary_pack(self):
+        writer = PackWriter(self.pack_dir)
+        obj_hash, _, compressed = packed_object(b"x\n")
+        writer.add(obj_hash, compressed)
+        writer.discard()
+        self.assertEqual(os.listdir(self.pack_dir), [])
+        self.assertIsNone(writer.write())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,271 @@
+"""
+Tests for the RVS repository core.
+"""
+import importlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import rvs.core.objects
+import rvs.core.repository
+from rvs.commands.show import ShowCommand
+from rvs.core.repository import RVS
+
+
+def init_repo(path: Path) -> RVS:
+    """Initialize a repository at path without printing to the test output."""
+    repo = RVS(str(path))
+    with redirect_stdout(io.StringIO()):
+        repo.init()
+    return RVS(str(path))
+
+
+class RepositoryTestCase(unittest.TestCase):
+    """Runs each test in a fresh temporary directory."""
+    
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp()).resolve()
+        self.addCleanup(shutil.rmtree, str(self.tmp), True)
+
+
+@unittest.skipUnless(hasattr(os, "symlink"), "symlinks not supported")
+class NormalizePathTest(RepositoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        real = self.tmp / "real"
+        real.mkdir()
+        self.link = self.tmp / "link"
+        try:
+            os.symlink(str(real), str(self.link))
+        except OSError:
+            self.skipTest("cannot create symlinks")
+        self.repo = init_repo(self.link)
+        (self.link / "f.txt").write_text("x\n")
+    
+    def test_relative_paths_are_normalized_lexically(self):
+        self.assertEqual(self.repo._normalize_path("sub/../f.txt"), "f.txt")
+        self.assertEqual(self.repo._normalize_path("./f.txt"), "f.txt")
+    
+    def test_absolute_path_through_symlinked_root(self):
+        self.assertEqual(self.repo._normalize_path(str(self.link / "f.txt")), "f.txt")
+        self.assertEqual(self.repo._normalize_path(str(self.link)), ".")
+    
+    def test_path_outside_repo_is_returned_unchanged(self):
+        outside = str(self.tmp / "elsewhere.txt")
+        self.assertEqual(self.repo._normalize_path(outside), outside)
+    
+    def test_add_through_symlinked_root_stores_relative_key(self):
+        with redirect_stdout(io.StringIO()):
+            self.repo.add([str(self.link / "f.txt")])
+        self.assertEqual(list(self.repo._load_index()), ["f.txt"])
+
+
+def reload_without_orjson(module):
+    """Re-import module with orjson unavailable; the original import is restored on cleanup."""
+    with mock.patch.dict(sys.modules, {"orjson": None}):
+        return importlib.reload(module)
+
+
+class CommitEncodingTest(RepositoryTestCase):
+    
+    COMMIT = {
+        "tree": "0" * 40,
+        "parent": None,
+        "message": "msg \u00e9 \u65e5\u672c \u2028 \"quoted\"\n\tend",
+        "timestamp": 1700000000,
+        "author": "J\u00f6rg",
+    }
+    
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(importlib.reload, rvs.core.repository)
+        self.addCleanup(importlib.reload, rvs.core.objects)
+    
+    def test_fallback_writes_raw_utf8(self):
+        repository = reload_without_orjson(rvs.core.repository)
+        objects = reload_without_orjson(rvs.core.objects)
+        for dumps in (repository._json_dumps, objects._dumps):
+            content = dumps(self.COMMIT)
+            self.assertIn("\u00e9".encode("utf-8"), content)
+            self.assertNotIn(b"\\u00e9", content)
+            self.assertEqual(repository._json_loads(content), self.COMMIT)
+    
+    def test_commit_id_does_not_depend_on_orjson(self):
+        try:
+            import orjson
+        except ImportError:
+            self.skipTest("orjson is not installed")
+        init_repo(self.tmp)
+        fallback = reload_without_orjson(rvs.core.repository)
+        fallback_hash = fallback.RVS(str(self.tmp))._write_commit(dict(self.COMMIT))
+        
+        repository = importlib.reload(rvs.core.repository)
+        self.assertIs(repository._json_dumps, orjson.dumps)
+        self.assertEqual(repository.RVS(str(self.tmp))._write_commit(dict(self.COMMIT)),
+                         fallback_hash)
+    
+    def test_surrogate_message_commits_with_and_without_orjson(self):
+        init_repo(self.tmp)
+        commit = dict(self.COMMIT, message="bad \udcff msg")
+        fallback = reload_without_orjson(rvs.core.repository)
+        fallback_hash = fallback.RVS(str(self.tmp))._write_commit(dict(commit))
+        
+        repository = importlib.reload(rvs.core.repository)
+        repo = repository.RVS(str(self.tmp))
+        self.assertEqual(repo._write_commit(dict(commit)), fallback_hash)
+        self.assertEqual(repo._read_commit(fallback_hash)["message"], "bad \udcff msg")
+        
+        objects = importlib.reload(rvs.core.objects)
+        content = objects.Commit(commit["tree"], commit["message"]).content
+        self.assertEqual(objects.Commit.from_content(content).message, "bad \udcff msg")
+    
+    def test_reads_baseline_commit_with_lone_surrogate(self):
+        repo = init_repo(self.tmp)
+        (self.tmp / "f.txt").write_text("x\n")
+        with redirect_stdout(io.StringIO()):
+            repo.add(["f.txt"])
+        tree_hash = repo._create_tree(dict(repo._load_index()))
+        # Written the way older versions did: indented stdlib JSON, which
+        # escapes the surrogate a non-UTF-8 argv decodes to as \udcff
+        commit = dict(self.COMMIT, tree=tree_hash, message="bad \udcff msg")
+        content = json.dumps(commit, indent=2).encode()
+        commit_hash = repo._write_object(content, "commit")
+        repo._set_branch_commit("main", commit_hash)
+        
+        self.assertEqual(repo._read_commit(commit_hash)["message"], "bad \udcff msg")
+        self.assertEqual(rvs.core.objects.Commit.from_content(content).message, "bad \udcff msg")
+        out = io.StringIO()
+        with redirect_stdout(out):
+            RVS(str(self.tmp)).status()
+        self.assertNotIn("No commits yet", out.getvalue())
+
+
+class ObjectWriteTest(RepositoryTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.repo = init_repo(self.tmp)
+    
+    def loose_path(self, obj_hash: str) -> Path:
+        return self.repo.objects_dir / obj_hash[:2] / obj_hash[2:]
+    
+    def test_interrupted_write_leaves_no_object(self):
+        def fail(out, *args, **kwargs):
+            out.write(b"partial")
+            raise OSError("disk full")
+        
+        with mock.patch.object(rvs.core.repository, "write_compressed_object", fail):
+            with self.assertRaises(rvs.core.repository.ObjectError):
+                self.repo._write_object(b"content\n")
+        
+        leftovers = [name for name in os.listdir(self.repo.objects_dir) if name.startswith("tmp_obj_")]
+        self.assertEqual(leftovers, [])
+        obj_hash = self.repo._write_object(b"content\n")
+        self.assertEqual(self.repo._read_object(obj_hash), ("blob", b"content\n"))
+    
+    def test_streamed_blob_is_remembered(self):
+        path = self.tmp / "big.txt"
+        path.write_bytes(b"x" * 1000)
+        obj_hash = self.repo._get_file_hash(path)
+        self.assertIn(obj_hash[2:], self.repo._known_object_names(obj_hash[:2]))
+    
+    def test_streamed_blob_does_not_replace_stored_object(self):
+        path = self.tmp / "big.txt"
+        path.write_bytes(b"y" * 1000)
+        obj_hash = self.repo._stream_write_blob(path)
+        inode = self.loose_path(obj_hash).stat().st_ino
+        
+        # Stored by an earlier run
+        self.assertEqual(RVS(str(self.tmp))._stream_write_blob(path), obj_hash)
+        self.assertEqual(self.loose_path(obj_hash).stat().st_ino, inode)
+        leftovers = [name for name in os.listdir(self.repo.objects_dir) if name.startswith("tmp_obj_")]
+        self.assertEqual(leftovers, [])
+    
+    def test_packed_blobs_are_remembered_and_not_rewritten_loose(self):
+        for i in range(40):
+            (self.tmp / f"f{i}.txt").write_text(f"file {i}\n")
+        with redirect_stdout(io.StringIO()):
+            self.repo.add(["."])
+        
+        obj_hash = self.repo._load_index()["f7.txt"]
+        self.assertFalse(self.loose_path(obj_hash).exists())
+        self.assertIn(obj_hash[2:], self.repo._known_object_names(obj_hash[:2]))
+        self.assertEqual(self.repo._write_object(b"file 7\n"), obj_hash)
+        self.assertEqual(self.repo._stream_write_blob(self.tmp / "f7.txt"), obj_hash)
+        self.assertFalse(self.loose_path(obj_hash).exists())
+
+
+class AbbreviatedHashTest(RepositoryTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.repo = init_repo(self.tmp)
+        for i in range(40):
+            (self.tmp / f"f{i}.txt").write_text(f"file {i}\n")
+        with redirect_stdout(io.StringIO()):
+            self.repo.add(["."])
+        self.packed = self.repo._load_index()["f7.txt"]
+        self.loose = self.repo._write_object(b"loose blob\n")
+    
+    def test_finds_packed_and_loose_objects(self):
+        self.assertFalse((self.repo.objects_dir / self.packed[:2] / self.packed[2:]).exists())
+        for obj_hash in (self.packed, self.loose):
+            for length in (4, 7, 40):
+                self.assertIn(obj_hash, self.repo._find_objects_by_prefix(obj_hash[:length]))
+        self.assertIn(self.packed, self.repo._find_objects_by_prefix(self.packed[:7].upper()))
+    
+    def test_rejects_non_hex_prefixes(self):
+        self.assertEqual(self.repo._find_objects_by_prefix("..co"), [])
+        self.assertEqual(self.repo._find_objects_by_prefix("zzzz"), [])
+    
+    def test_show_resolves_abbreviated_packed_blob(self):
+        command = ShowCommand(self.repo)
+        self.assertEqual(command._resolve_object(self.packed[:7]), self.packed)
+
+
+class StatusTest(RepositoryTestCase):
+    
+    def test_reports_staged_modified_and_untracked_files(self):
+        repo = init_repo(self.tmp)
+        (self.tmp / "staged.txt").write_text("a\n")
+        (self.tmp / "changed.txt").write_text("b\n")
+        with redirect_stdout(io.StringIO()):
+            repo.add(["staged.txt", "changed.txt"])
+        (self.tmp / "changed.txt").write_text("b2\n")
+        (self.tmp / "new.txt").write_text("c\n")
+        
+        out = io.StringIO()
+        with redirect_stdout(out):
+            RVS(str(self.tmp)).status()
+        output = out.getvalue()
+        self.assertIn("new file:   staged.txt", output)
+        self.assertIn("modified:   changed.txt", output)
+        self.assertIn("\tnew.txt", output)
+
+
+class TreeParsingTest(RepositoryTestCase):
+    
+    def test_tree_object_and_repository_parse_identically(self):
+        repo = init_repo(self.tmp)
+        content = "\n".join([
+            "blob " + "a" * 40 + " dir/file with spaces.txt",
+            "blob " + "b" * 40 + " caf\u00e9/\u65e5\u672c.txt",
+            "",
+        ]).encode()
+        tree_hash = repo._write_object(content, "tree")
+        
+        expected = {"dir/file with spaces.txt": "a" * 40, "caf\u00e9/\u65e5\u672c.txt": "b" * 40}
+        self.assertEqual(repo._read_tree(tree_hash), expected)
+        self.assertEqual(rvs.core.objects.Tree.from_content(content).entries, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()